@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import defer
+from config import settings
+from database import CreatorProfile, async_engine
+from services.qloo_service import QlooService, ProgressCallback
+from services.taste_summary import build_taste_summary, is_current_taste_summary
+
+# For the new structure, insights are embedded in the taste profile.
+# We can provide some generic, high-level recommendations.
+ANALYSIS_RECOMMENDATIONS = [
+    "Leverage cross-domain interests for unique content mashups.",
+    "Align brand partnerships with the top taste affinities for authenticity.",
+    "Use the identified taste patterns to refine your content's aesthetic and tone."
+]
+
+# First key of the (namespace, profile id) PostgreSQL advisory lock
+ANALYSIS_LOCK_NAMESPACE = 7301
+
+def make_analysis_key(keywords: Optional[List[str]]) -> str:
+    """Hash of the normalized keyword set, the only input the live analysis depends on."""
+    normalized = sorted({QlooService._normalize_keyword(k) for k in keywords or []} - {""})
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+class SharedAnalysisRun:
+    """
+    One in-flight analysis and the progress listeners of every caller
+    sharing it. Events already sent are replayed to a caller that joins late.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.listeners: List[ProgressCallback] = []
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+
+    def listen(self, on_progress: Optional[ProgressCallback]) -> None:
+        if on_progress is None:
+            return
+        for event, data in self.events:
+            on_progress(event, data)
+        self.listeners.append(on_progress)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append((event, data))
+        for on_progress in self.listeners:
+            on_progress(event, data)
+
+class AnalysisSingleFlight:
+    """
+    Coalesces concurrent analyses of the same profile and keyword set onto
+    one run of the Qloo chain, whose result every caller shares.
+
+    The shared run uses its own connection so one caller going away can't
+    cancel it. Its write is conditional on analyzed_at, so an analysis that
+    started earlier never overwrites one that started later. With
+    analysis_db_lock on PostgreSQL, runs for the same profile are also
+    serialized across workers; a run that finds a matching analysis was
+    stored while it waited for the lock reuses that instead of calling Qloo.
+    A locked run does all of its reads and writes on the connection holding
+    the lock, so it never needs a second pooled connection.
+    """
+
+    def __init__(self):
+        self.use_db_lock = settings.analysis_db_lock and async_engine.dialect.name == "postgresql"
+        if settings.analysis_db_lock and not self.use_db_lock:
+            print("  WARNING: ANALYSIS_DB_LOCK needs PostgreSQL; only coalescing within this process")
+        self._inflight: Dict[Tuple[int, str, bool, Optional[int]], SharedAnalysisRun] = {}
+        self.runs = 0
+        self.coalesced = 0
+        self.reused = 0
+        self.stale_writes_skipped = 0
+
+    async def analyze(
+        self,
+        qloo_service: QlooService,
+        profile: CreatorProfile,
+        on_progress: Optional[ProgressCallback] = None,
+        incremental: bool = False,
+        max_domain_age_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        profile_id, keywords, audience_data = profile.id, profile.keywords, profile.audience_data
+        key = (profile_id, make_analysis_key(keywords), incremental, max_domain_age_seconds)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+        else:
+            shared = SharedAnalysisRun()
+
+            async def run():
+                try:
+                    return await self._run(
+                        qloo_service, profile_id, key[1], keywords, audience_data, shared.publish, incremental, max_domain_age_seconds
+                    )
+                finally:
+                    self._inflight.pop(key, None)
+
+            shared.task = asyncio.create_task(run())
+            self._inflight[key] = shared
+        # Every caller sharing the run gets its progress events
+        shared.listen(on_progress)
+        return await asyncio.shield(shared.task)
+
+    async def _run(
+        self,
+        qloo_service: QlooService,
+        profile_id: int,
+        key: str,
+        keywords: List[str],
+        audience_data: Optional[str],
+        on_progress: Optional[ProgressCallback],
+        incremental: bool,
+        max_domain_age_seconds: Optional[int]
+    ) -> Dict[str, Any]:
+        run_args = (qloo_service, profile_id, key, keywords, audience_data, on_progress, incremental, max_domain_age_seconds)
+        if not self.use_db_lock:
+            return await self._analyze_and_store(*run_args, datetime.utcnow(), None)
+
+        async with async_engine.connect() as lock_connection:
+            # Only what changes when an analysis is stored; taste_profile is read after the wait if needed
+            waited_from = await self._stored_analysis(lock_connection, profile_id, CreatorProfile.analyzed_at)
+            await lock_connection.execute(
+                text("SELECT pg_advisory_lock(:namespace, :profile_id)"),
+                {"namespace": ANALYSIS_LOCK_NAMESPACE, "profile_id": profile_id}
+            )
+            # The lock is session-level; don't sit idle in a transaction for the whole run
+            await lock_connection.commit()
+            try:
+                # Runs are serialized from here, so the one that got the lock last is the newest
+                started_at = datetime.utcnow()
+                stored = await self._stored_analysis(
+                    lock_connection, profile_id,
+                    CreatorProfile.analysis_key, CreatorProfile.analyzed_at, CreatorProfile.taste_profile
+                )
+                # Another worker stored this exact analysis while we waited for the lock
+                if (
+                    stored and stored.analysis_key == key and stored.analyzed_at
+                    and (waited_from is None or stored.analyzed_at != waited_from.analyzed_at)
+                ):
+                    self.reused += 1
+                    return stored.taste_profile
+                return await self._analyze_and_store(*run_args, started_at, lock_connection)
+            finally:
+                # The write is committed before unlocking, so the next run sees it
+                await lock_connection.rollback()
+                await lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(:namespace, :profile_id)"),
+                    {"namespace": ANALYSIS_LOCK_NAMESPACE, "profile_id": profile_id}
+                )
+                await lock_connection.commit()
+
+    @asynccontextmanager
+    async def _connection(self, lock_connection: Optional[AsyncConnection]) -> AsyncIterator[AsyncConnection]:
+        """The run's lock connection if it holds the DB lock, else a short-lived pooled one; committed on exit."""
+        if lock_connection is not None:
+            yield lock_connection
+            await lock_connection.commit()
+            return
+        async with async_engine.connect() as connection:
+            yield connection
+            await connection.commit()
+
+    async def _stored_analysis(self, lock_connection: Optional[AsyncConnection], profile_id: int, *columns):
+        async with self._connection(lock_connection) as connection:
+            return (await connection.execute(select(*columns).where(CreatorProfile.id == profile_id))).first()
+
+    async def _analyze_and_store(
+        self,
+        qloo_service: QlooService,
+        profile_id: int,
+        key: str,
+        keywords: List[str],
+        audience_data: Optional[str],
+        on_progress: Optional[ProgressCallback],
+        incremental: bool,
+        max_domain_age_seconds: Optional[int],
+        started_at: datetime,
+        lock_connection: Optional[AsyncConnection]
+    ) -> Dict[str, Any]:
+        self.runs += 1
+        previous = None
+        if incremental:
+            # Read at run time, so a run that waited for the lock builds on the latest analysis
+            stored = await self._stored_analysis(lock_connection, profile_id, CreatorProfile.taste_profile)
+            previous = stored.taste_profile if stored else None
+        analysis_result = await qloo_service.analyze_audience_taste(
+            audience_data=audience_data,
+            keywords=keywords,
+            on_progress=on_progress,
+            previous=previous,
+            max_domain_age_seconds=max_domain_age_seconds
+        )
+
+        async with self._connection(lock_connection) as connection:
+            result = await connection.execute(
+                update(CreatorProfile)
+                .where(
+                    CreatorProfile.id == profile_id,
+                    or_(CreatorProfile.analyzed_at.is_(None), CreatorProfile.analyzed_at <= started_at)
+                )
+                .values(
+                    taste_profile=analysis_result,
+                    taste_summary=build_taste_summary(analysis_result),
+                    analysis_key=key,
+                    analyzed_at=started_at
+                )
+            )
+        if result.rowcount == 0:
+            self.stale_writes_skipped += 1
+            print(f"  Not storing analysis of profile {profile_id}: a newer analysis is already stored")
+        return analysis_result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db_lock": self.use_db_lock,
+            "in_flight": len(self._inflight),
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "reused": self.reused,
+            "stale_writes_skipped": self.stale_writes_skipped,
+        }
+
+analysis_single_flight = AnalysisSingleFlight()
+
+async def analyze_and_store_profile(
+    qloo_service: QlooService,
+    profile: CreatorProfile,
+    on_progress: Optional[ProgressCallback] = None,
+    incremental: bool = False,
+    max_domain_age_seconds: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run the Qloo search+insights chain for a creator profile and store the
+    result on profile.taste_profile, together with the precompiled summary
+    the generators reuse. Concurrent calls for the same profile and keywords
+    share one run. With incremental=True, fresh domains of the stored
+    analysis are kept and only the rest are re-fetched (see
+    QlooService.analyze_audience_taste); max_domain_age_seconds overrides
+    how old a kept domain may be. Shared by /analyze-audience, the
+    background analysis jobs and the profile refresh scheduler.
+    """
+    return await analysis_single_flight.analyze(qloo_service, profile, on_progress, incremental, max_domain_age_seconds)
+
+async def load_profiles_for_generation(db: AsyncSession, profile_ids: List[int], user_id: int) -> Dict[int, CreatorProfile]:
+    """
+    Load the given creator profiles for idea generation without their raw
+    taste_profile JSON, keyed by id. The raw JSON is only fetched for profiles
+    whose stored summary is missing or outdated, in which case the summary is
+    rebuilt and saved. Ids that don't exist or belong to another user are
+    left out.
+    """
+    result = await db.scalars(
+        select(CreatorProfile)
+        .options(defer(CreatorProfile.taste_profile))
+        .where(CreatorProfile.id.in_(set(profile_ids)), CreatorProfile.user_id == user_id)
+    )
+    profiles = {profile.id: profile for profile in result}
+    await ensure_taste_summaries(db, profiles.values())
+    return profiles
+
+async def ensure_taste_summaries(db: AsyncSession, profiles: Iterable[CreatorProfile]) -> None:
+    """
+    Rebuild and save the taste summary of any profile (loaded with
+    taste_profile deferred) whose summary is missing or outdated.
+    """
+    rebuilt = False
+    for profile in profiles:
+        if is_current_taste_summary(profile.taste_summary):
+            continue
+        await db.refresh(profile, attribute_names=["taste_profile"])
+        if profile.taste_profile:
+            profile.taste_summary = build_taste_summary(profile.taste_profile)
+            rebuilt = True
+    if rebuilt:
+        await db.commit()
+
+async def load_profile_for_generation(db: AsyncSession, profile_id: int, user_id: int) -> Optional[CreatorProfile]:
+    """Single-profile form of load_profiles_for_generation."""
+    profiles = await load_profiles_for_generation(db, [profile_id], user_id)
+    return profiles.get(profile_id)
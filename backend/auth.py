@@ -1,23 +1,72 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db, User
-from schemas import TokenData
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, User
+from schemas import TokenData, AuthenticatedUser
 from config import settings
+from services.lru_cache import LRUCache, MISSING
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost than bcrypt_rounds count as deprecated and get rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt is CPU-bound (~100-300 ms per call), so it runs on a dedicated bounded
+# pool instead of the event loop. bcrypt releases the GIL while hashing.
+_password_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt")
+_password_queue_lock = threading.Lock()
+_password_queue_depth = 0
+_password_queue_peak = 0
+_password_jobs_total = 0
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    """Run a hashing call on the bcrypt pool, tracking how many are waiting or running."""
+    global _password_queue_depth, _password_queue_peak, _password_jobs_total
+    with _password_queue_lock:
+        _password_queue_depth += 1
+        _password_queue_peak = max(_password_queue_peak, _password_queue_depth)
+        _password_jobs_total += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        with _password_queue_lock:
+            _password_queue_depth -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop. Returns (valid, new_hash), where
+    new_hash is set when the stored hash uses outdated cost parameters.
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def password_hasher_stats() -> dict:
+    return {
+        "workers": settings.password_hash_workers,
+        "queue_depth": _password_queue_depth,
+        "peak_queue_depth": _password_queue_peak,
+        "jobs_total": _password_jobs_total,
+    }
+
+def shutdown_password_hasher():
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,9 +77,36 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+# Decoded JWT claims keyed by raw token, kept until the token expires
+_claims_cache = LRUCache(settings.auth_claims_cache_max_entries)
+# Fields needed to authorize a request, keyed by token subject (email)
+_user_cache = LRUCache(settings.auth_user_cache_max_entries, ttl_seconds=settings.auth_user_cache_ttl_seconds)
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    payload = _claims_cache.get(token)
+    if payload is not MISSING:
+        return payload
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    exp = payload.get("exp")
+    if exp is not None:
+        remaining = exp - time.time()
+        if remaining > 0:
+            _claims_cache.set(token, payload, ttl_seconds=remaining)
+    return payload
+
+def invalidate_cached_user(email: str):
+    """Drop a user's cached authorization fields; call whenever the user row changes."""
+    _user_cache.delete(email)
+
+def auth_cache_stats() -> dict:
+    return {
+        "users": _user_cache.stats(),
+        "claims": _claims_cache.stats(),
+    }
+
 def verify_token(token: str, credentials_exception):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = _decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -39,19 +115,26 @@ def verify_token(token: str, credentials_exception):
         raise credentials_exception
     return token_data
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     token_data = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
+    cached_user = _user_cache.get(token_data.email)
+    if cached_user is not MISSING:
+        return cached_user
+    row = (await db.execute(
+        select(User.id, User.email, User.is_active).where(User.email == token_data.email)
+    )).first()
+    if row is None:
         raise credentials_exception
+    user = AuthenticatedUser(id=row.id, email=row.email, is_active=row.is_active)
+    _user_cache.set(token_data.email, user)
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user 
\ No newline at end of file
@@ -0,0 +1,372 @@
+"""
+Offline idea generation through the OpenAI Batch API.
+
+Meant for non-interactive runs such as a nightly refresh across every
+profile. Batch requests are billed at a discount and don't count against
+the synchronous rate limits. The pipeline has four steps:
+
+    prepare  write one Batch API request line per analyzed profile and kind
+    submit   hand the JSONL file to an executor (OpenAI, or a local stand-in)
+    fetch    wait for the batch to finish and download its output file
+    ingest   turn the output lines into ContentIdea / MonetizationIdea rows
+
+Ingestion is idempotent. Each idea row records "<custom_id>#<n>" in
+batch_custom_id, so ingesting the same output twice adds nothing.
+
+Usage:
+    python batch_pipeline.py prepare requests.jsonl [--kinds content,monetization]
+    python batch_pipeline.py submit requests.jsonl [--local]
+    python batch_pipeline.py fetch <batch_id> output.jsonl [--local]
+    python batch_pipeline.py ingest output.jsonl
+    python batch_pipeline.py run [--local]    # all four steps
+"""
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+from openai import AsyncOpenAI
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from config import settings
+from database import AsyncSessionLocal, bulk_insert, CreatorProfile, ContentIdea, MonetizationIdea
+from analysis import ensure_taste_summaries
+from services.openai_service import OpenAIService
+
+CONTENT = "content"
+MONETIZATION = "monetization"
+KINDS = (CONTENT, MONETIZATION)
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Keeps the "already ingested?" IN (...) lookups under database parameter limits
+INGEST_LOOKUP_CHUNK = 500
+
+# Batch statuses after which the batch will not change any more
+COMPLETED = "completed"
+TERMINAL_STATUSES = {COMPLETED, "failed", "expired", "cancelled"}
+
+class BatchError(Exception):
+    pass
+
+def make_custom_id(kind: str, profile_id: int, run_id: str, variant: str) -> str:
+    """kind:profile_id:run_id:variant, where variant is the content or collaboration type."""
+    return f"{kind}:{profile_id}:{run_id}:{quote(variant, safe='')}"
+
+def parse_custom_id(custom_id: str) -> Tuple[str, int, str, str]:
+    kind, profile_id, run_id, variant = custom_id.split(":", 3)
+    return kind, int(profile_id), run_id, unquote(variant)
+
+async def prepare_batch(
+    db: AsyncSession,
+    openai_service: OpenAIService,
+    path: str,
+    kinds: Iterable[str] = KINDS,
+    content_type: str = "tiktok",
+    collaboration_type: str = "sponsorship",
+    user_id: Optional[int] = None,
+    run_id: Optional[str] = None
+) -> int:
+    """
+    Write one request line per analyzed profile and kind to path, using the
+    same prompt builders as the interactive endpoints. Returns the number of
+    lines written.
+    """
+    run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    query = select(CreatorProfile).options(defer(CreatorProfile.taste_profile)).order_by(CreatorProfile.id)
+    if user_id is not None:
+        query = query.where(CreatorProfile.user_id == user_id)
+    profiles = list(await db.scalars(query))
+    await ensure_taste_summaries(db, profiles)
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for profile in profiles:
+            if not profile.taste_summary:
+                continue
+            for kind in kinds:
+                if kind == CONTENT:
+                    prompt, _ = openai_service.build_content_prompt(
+                        profile.niche_description, None, content_type, profile.brand_voice,
+                        profile.negative_keywords, taste_summary=profile.taste_summary
+                    )
+                    custom_id = make_custom_id(kind, profile.id, run_id, content_type)
+                elif kind == MONETIZATION:
+                    prompt, _ = openai_service.build_monetization_prompt(
+                        profile.niche_description, None, collaboration_type, profile.brand_voice,
+                        profile.negative_keywords, taste_summary=profile.taste_summary
+                    )
+                    custom_id = make_custom_id(kind, profile.id, run_id, collaboration_type)
+                else:
+                    raise ValueError(f"Unknown idea kind: {kind}")
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": openai_service.chat_request_body(prompt),
+                }
+                f.write(json.dumps(line) + "\n")
+                written += 1
+    print(f"Wrote {written} batch requests for {len(profiles)} profiles to {path}")
+    return written
+
+class OpenAIBatchExecutor:
+    """Runs request files through the OpenAI Batch API."""
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
+        self.client = client or AsyncOpenAI(api_key=settings.openai_api_key)
+
+    async def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=settings.openai_batch_completion_window,
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def download(self, batch_id: str, output_path: str) -> None:
+        """Write the output lines, followed by any per-request error lines, to output_path."""
+        batch = await self.client.batches.retrieve(batch_id)
+        with open(output_path, "w", encoding="utf-8") as out:
+            # Expired batches can still carry the requests that did finish
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    content = await self.client.files.content(file_id)
+                    out.write(content.text)
+
+def fake_chat_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic stand-in for a chat completion, shaped after the prompt's kind."""
+    prompt = body["messages"][-1]["content"]
+    if "monetization ideas" in prompt:
+        ideas = [{
+            "brand_name": f"Brand {n}",
+            "collaboration_type": "sponsorship",
+            "pitch_angle": "Offline batch pitch",
+            "taste_alignment": "Matches the audience taste profile",
+            "why_it_works": "Generated by the local batch executor",
+        } for n in range(1, 4)]
+    else:
+        ideas = [{
+            "title": f"Batch idea {n}",
+            "concept": "Offline batch concept",
+            "visual_elements": ["b-roll"],
+            "call_to_action": "Follow for more",
+            "why_it_works": "Generated by the local batch executor",
+        } for n in range(1, OpenAIService.CONTENT_IDEAS_PER_REQUEST + 1)]
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps({"ideas": ideas})}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+class LocalBatchExecutor:
+    """
+    Offline stand-in for the Batch API. It answers every request at once with
+    respond(body) and writes output in the Batch API's format, so the whole
+    pipeline runs without network access. Output is kept under directory,
+    which lets submit and fetch run in separate processes.
+    """
+
+    def __init__(self, directory: str, respond: Callable[[Dict[str, Any]], Dict[str, Any]] = fake_chat_completion):
+        self.directory = directory
+        self.respond = respond
+
+    def _output_path(self, batch_id: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}_output.jsonl")
+
+    async def submit(self, input_path: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        batch_id = f"batch_local_{uuid.uuid4().hex}"
+        with open(input_path, encoding="utf-8") as f, open(self._output_path(batch_id), "w", encoding="utf-8") as out:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                request = json.loads(raw)
+                result = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"], "response": None, "error": None}
+                try:
+                    result["response"] = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self.respond(request["body"])}
+                except Exception as e:
+                    result["error"] = {"code": "local_executor_error", "message": str(e)}
+                out.write(json.dumps(result) + "\n")
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        return COMPLETED if os.path.exists(self._output_path(batch_id)) else "failed"
+
+    async def download(self, batch_id: str, output_path: str) -> None:
+        with open(self._output_path(batch_id), encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+            out.write(src.read())
+
+async def fetch_batch(executor, batch_id: str, output_path: str, poll_seconds: Optional[float] = None) -> str:
+    """Poll until the batch is finished, then download whatever output it has. Returns the final status."""
+    poll_seconds = settings.openai_batch_poll_seconds if poll_seconds is None else poll_seconds
+    while True:
+        status = await executor.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            break
+        print(f"Batch {batch_id} is {status}; checking again in {poll_seconds}s")
+        await asyncio.sleep(poll_seconds)
+    if status == "failed":
+        raise BatchError(f"Batch {batch_id} failed")
+    await executor.download(batch_id, output_path)
+    return status
+
+def _completion_content(result: Dict[str, Any]) -> Optional[Any]:
+    """The parsed JSON the model returned for one output line, or None if the request failed."""
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code") != 200:
+        return None
+    try:
+        return json.loads(response["body"]["choices"][0]["message"]["content"])
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+        return None
+
+async def ingest_batch_output(db: AsyncSession, openai_service: OpenAIService, path: str) -> Dict[str, int]:
+    """
+    Store the ideas from a batch output file. Requests that failed, profiles
+    deleted since the batch was prepared, and ideas already ingested are
+    skipped. Returns counts of what happened.
+    """
+    counts = {"requests": 0, "failed_requests": 0, "missing_profiles": 0, "inserted": 0, "already_ingested": 0}
+    parsed: List[Tuple[str, int, str, str, List[Dict[str, Any]]]] = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            result = json.loads(raw)
+            counts["requests"] += 1
+            content = _completion_content(result)
+            if content is None:
+                counts["failed_requests"] += 1
+                continue
+            kind, profile_id, _, variant = parse_custom_id(result["custom_id"])
+            if kind == CONTENT:
+                ideas = openai_service.parse_content_ideas(content)
+            else:
+                ideas = openai_service.parse_monetization_ideas(content)
+            parsed.append((result["custom_id"], profile_id, kind, variant, ideas))
+
+    owners = dict((await db.execute(
+        select(CreatorProfile.id, CreatorProfile.user_id)
+        .where(CreatorProfile.id.in_({profile_id for _, profile_id, _, _, _ in parsed}))
+    )).all()) if parsed else {}
+
+    rows: Dict[Any, List[Dict[str, Any]]] = {ContentIdea: [], MonetizationIdea: []}
+    for custom_id, profile_id, kind, variant, ideas in parsed:
+        user_id = owners.get(profile_id)
+        if user_id is None:
+            counts["missing_profiles"] += 1
+            continue
+        for n, idea in enumerate(ideas):
+            common = {"user_id": user_id, "creator_profile_id": profile_id, "batch_custom_id": f"{custom_id}#{n}"}
+            if kind == CONTENT:
+                rows[ContentIdea].append({
+                    "title": idea.get("title", ""),
+                    "concept": idea.get("concept", ""),
+                    "content_type": variant,
+                    "visual_elements": idea.get("visual_elements", []),
+                    "call_to_action": idea.get("call_to_action", ""),
+                    "why_it_works": idea.get("why_it_works", ""),
+                    **common
+                })
+            else:
+                rows[MonetizationIdea].append({
+                    "brand_name": idea["brand_name"],
+                    "collaboration_type": idea["collaboration_type"],
+                    "pitch_angle": idea["pitch_angle"],
+                    "taste_alignment": idea["taste_alignment"],
+                    "why_it_works": idea.get("why_it_works"),
+                    **common
+                })
+
+    try:
+        for model, model_rows in rows.items():
+            keys = [row["batch_custom_id"] for row in model_rows]
+            existing = set()
+            for start in range(0, len(keys), INGEST_LOOKUP_CHUNK):
+                chunk = keys[start:start + INGEST_LOOKUP_CHUNK]
+                existing.update(await db.scalars(select(model.batch_custom_id).where(model.batch_custom_id.in_(chunk))))
+            new_rows = [row for row in model_rows if row["batch_custom_id"] not in existing]
+            counts["already_ingested"] += len(model_rows) - len(new_rows)
+            counts["inserted"] += len(await bulk_insert(db, model, new_rows))
+        await db.commit()
+    except IntegrityError:
+        # Another ingest of the same file won the race; its rows are the same ideas
+        await db.rollback()
+        raise BatchError("Batch output was ingested concurrently; run ingest again to pick up anything missed")
+    return counts
+
+def _executor(local: bool):
+    return LocalBatchExecutor(settings.openai_batch_local_dir) if local else OpenAIBatchExecutor()
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline idea generation through the OpenAI Batch API")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prepare = sub.add_parser("prepare")
+    prepare.add_argument("requests_path")
+    submit = sub.add_parser("submit")
+    submit.add_argument("requests_path")
+    fetch = sub.add_parser("fetch")
+    fetch.add_argument("batch_id")
+    fetch.add_argument("output_path")
+    ingest = sub.add_parser("ingest")
+    ingest.add_argument("output_path")
+    run = sub.add_parser("run")
+    for command in (prepare, run):
+        command.add_argument("--kinds", default=",".join(KINDS))
+        command.add_argument("--content-type", default="tiktok")
+        command.add_argument("--collaboration-type", default="sponsorship")
+        command.add_argument("--user-id", type=int)
+    for command in (submit, fetch, run):
+        command.add_argument("--local", action="store_true", help="use the offline stand-in executor")
+    args = parser.parse_args(argv)
+
+    openai_service = OpenAIService()
+    try:
+        if args.command in ("prepare", "run"):
+            requests_path = getattr(args, "requests_path", None) or os.path.join(
+                settings.openai_batch_local_dir, f"requests_{datetime.utcnow():%Y%m%dT%H%M%S}.jsonl"
+            )
+            os.makedirs(os.path.dirname(requests_path) or ".", exist_ok=True)
+            async with AsyncSessionLocal() as db:
+                written = await prepare_batch(
+                    db, openai_service, requests_path,
+                    kinds=[kind.strip() for kind in args.kinds.split(",") if kind.strip()],
+                    content_type=args.content_type,
+                    collaboration_type=args.collaboration_type,
+                    user_id=args.user_id
+                )
+            if args.command == "prepare" or not written:
+                return
+            args.requests_path = requests_path
+        if args.command in ("submit", "run"):
+            batch_id = await _executor(args.local).submit(args.requests_path)
+            print(f"Submitted batch {batch_id}")
+            if args.command == "submit":
+                return
+            args.batch_id = batch_id
+            args.output_path = args.requests_path.replace("requests_", "output_")
+        if args.command in ("fetch", "run"):
+            status = await fetch_batch(_executor(args.local), args.batch_id, args.output_path)
+            print(f"Batch {args.batch_id} {status}; output written to {args.output_path}")
+            if args.command == "fetch":
+                return
+        async with AsyncSessionLocal() as db:
+            counts = await ingest_batch_output(db, openai_service, args.output_path)
+        print(f"Ingested {args.output_path}: {counts}")
+    finally:
+        await openai_service.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
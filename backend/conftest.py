@@ -0,0 +1,20 @@
+"""
+Test configuration: every test runs against a throwaway SQLite database
+migrated to head, with placeholder API keys so Qloo and OpenAI are never
+called. The environment is set here, before any backend module reads
+settings.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["QLOO_API_KEY"] = "YOUR_QLOO_API_KEY"
+os.environ["OPENAI_API_KEY"] = "YOUR_OPENAI_API_KEY"
+os.environ["PROFILE_REFRESH_ENABLED"] = "False"
+
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    from database import run_migrations
+    run_migrations()
@@ -0,0 +1,91 @@
+from typing import Any, Dict, List
+from sqlalchemy import Select, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import CreatorProfile, ContentIdea, MonetizationIdea
+from schemas import ContentIdea as ContentIdeaSchema, MonetizationIdea as MonetizationIdeaSchema
+
+def idea_counts_query(model, group_column: str, user_id: int) -> Select:
+    """
+    Idea and saved-idea counts for one user, grouped by creator profile and
+    group_column. The user_id filter is served by ix_<table>_user_id_generated_at.
+    """
+    group = getattr(model, group_column)
+    return (
+        select(
+            model.creator_profile_id,
+            group,
+            func.count(),
+            func.coalesce(func.sum(case((model.is_saved == True, 1), else_=0)), 0),
+        )
+        .where(model.user_id == user_id)
+        .group_by(model.creator_profile_id, group)
+    )
+
+def recent_ideas_query(model, columns: List[str], user_id: int, limit: int) -> Select:
+    return (
+        select(*(getattr(model, name) for name in columns))
+        .where(model.user_id == user_id)
+        .order_by(model.generated_at.desc(), model.id.desc())
+        .limit(limit)
+    )
+
+def fold_counts(rows) -> Dict[str, Any]:
+    """Totals, per-profile and per-group counts from idea_counts_query rows."""
+    counts = {"total": 0, "saved": 0, "by_profile": {}, "by_type": {}}
+    for profile_id, group, total, saved in rows:
+        counts["total"] += total
+        counts["saved"] += saved
+        counts["by_profile"][profile_id] = counts["by_profile"].get(profile_id, 0) + total
+        key = group or "unknown"
+        counts["by_type"][key] = counts["by_type"].get(key, 0) + total
+    return counts
+
+async def load_dashboard_summary(db: AsyncSession, user_id: int, recent: int) -> Dict[str, Any]:
+    """
+    Everything the dashboard shows, in five small queries: profile names,
+    one grouped count per idea table, and the newest few ideas of each kind.
+    """
+    profiles = (await db.execute(
+        select(CreatorProfile.id, CreatorProfile.profile_name)
+        .where(CreatorProfile.user_id == user_id)
+        .order_by(CreatorProfile.id)
+    )).all()
+    content = fold_counts((await db.execute(idea_counts_query(ContentIdea, "content_type", user_id))).all())
+    monetization = fold_counts((await db.execute(idea_counts_query(MonetizationIdea, "collaboration_type", user_id))).all())
+    recent_content = [
+        dict(row) for row in
+        (await db.execute(recent_ideas_query(ContentIdea, list(ContentIdeaSchema.model_fields), user_id, recent))).mappings()
+    ]
+    recent_monetization = [
+        dict(row) for row in
+        (await db.execute(recent_ideas_query(MonetizationIdea, list(MonetizationIdeaSchema.model_fields), user_id, recent))).mappings()
+    ]
+    # Same defensive cleanup as the /content-ideas list: visual_elements is always a list
+    for idea in recent_content:
+        if not isinstance(idea["visual_elements"], list):
+            idea["visual_elements"] = []
+
+    return {
+        "profile_count": len(profiles),
+        "profiles": [
+            {
+                "id": profile_id,
+                "profile_name": profile_name,
+                "content_ideas": content["by_profile"].get(profile_id, 0),
+                "monetization_ideas": monetization["by_profile"].get(profile_id, 0),
+            }
+            for profile_id, profile_name in profiles
+        ],
+        "content_ideas": {
+            "total": content["total"],
+            "saved": content["saved"],
+            "by_type": content["by_type"],
+        },
+        "monetization_ideas": {
+            "total": monetization["total"],
+            "saved": monetization["saved"],
+            "by_type": monetization["by_type"],
+        },
+        "recent_content_ideas": recent_content,
+        "recent_monetization_ideas": recent_monetization,
+    }
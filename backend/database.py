@@ -1,16 +1,68 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+import os
+from sqlalchemy import create_engine, insert, inspect, text, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+from typing import Any, Dict, List
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def get_async_database_url(url: str) -> str:
+    """Map the sync DATABASE_URL onto its async driver (asyncpg for Postgres, aiosqlite for SQLite)."""
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+def get_pool_options(url: str) -> dict:
+    """Explicit connection pool sizing; SQLite manages its own pool, so only pre-ping applies."""
+    if url.startswith("sqlite"):
+        return {"pool_pre_ping": settings.db_pool_pre_ping}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+ASYNC_SQLALCHEMY_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+# Sync engine: table creation and the thread-offloaded caches
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **get_pool_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **get_pool_options(ASYNC_SQLALCHEMY_DATABASE_URL))
+# expire_on_commit=False so committed objects can still be serialized without lazy reloads
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def idea_list_indexes(table: str) -> tuple:
+    """
+    Indexes behind the newest-first idea lists: per user, saved-only per user
+    (partial), and per creator profile. id is included for the keyset cursor.
+    """
+    return (
+        Index(f"ix_{table}_user_id_generated_at", "user_id", "generated_at", "id"),
+        Index(
+            f"ix_{table}_saved_user_id_generated_at", "user_id", "generated_at", "id",
+            postgresql_where=text("is_saved"),
+            sqlite_where=text("is_saved = 1"),
+        ),
+        Index(f"ix_{table}_creator_profile_id_generated_at", "creator_profile_id", "generated_at", "id"),
+    )
+
 class User(Base):
     __tablename__ = "users"
     
@@ -27,6 +79,10 @@ class User(Base):
 
 class CreatorProfile(Base):
     __tablename__ = "creator_profiles"
+    __table_args__ = (
+        # Per-user profile lists and the (id, user_id) ownership checks
+        Index("ix_creator_profiles_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -39,6 +95,11 @@ class CreatorProfile(Base):
     social_handle = Column(String, nullable=False)
     audience_data = Column(Text)
     taste_profile = Column(JSON)
+    # Precompiled summary + rendered prompt blocks (see services/taste_summary.py)
+    taste_summary = Column(JSON, nullable=True)
+    # Keyword-set hash the taste profile was analyzed for, and when that analysis started
+    analysis_key = Column(String(64), nullable=True)
+    analyzed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -48,6 +109,7 @@ class CreatorProfile(Base):
 
 class ContentIdea(Base):
     __tablename__ = "content_ideas"
+    __table_args__ = idea_list_indexes("content_ideas")
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -60,6 +122,8 @@ class ContentIdea(Base):
     why_it_works = Column(Text, nullable=True)
     is_saved = Column(Boolean, default=False)
     generated_at = Column(DateTime, default=datetime.utcnow)
+    # "<batch custom_id>#<n>" for ideas ingested from an offline batch, so re-ingesting is a no-op
+    batch_custom_id = Column(String, unique=True, index=True, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="content_ideas")
@@ -67,6 +131,7 @@ class ContentIdea(Base):
 
 class MonetizationIdea(Base):
     __tablename__ = "monetization_ideas"
+    __table_args__ = idea_list_indexes("monetization_ideas")
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -78,6 +143,35 @@ class MonetizationIdea(Base):
     why_it_works = Column(Text, nullable=True)
     is_saved = Column(Boolean, default=False)
     generated_at = Column(DateTime, default=datetime.utcnow)
+    # "<batch custom_id>#<n>" for ideas ingested from an offline batch, so re-ingesting is a no-op
+    batch_custom_id = Column(String, unique=True, index=True, nullable=True)
+
+class KeywordEntityCache(Base):
+    __tablename__ = "keyword_entity_cache"
+    
+    # Normalized keyword (whitespace collapsed, casefolded)
+    keyword = Column(String, primary_key=True)
+    # NULL means Qloo has no entity for this keyword (negative cache entry)
+    entity_id = Column(String, nullable=True)
+    resolved_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class InsightsCacheEntry(Base):
+    __tablename__ = "insights_cache"
+    
+    # sha256 of the canonical (sorted entity_ids, filter.type, take) request
+    cache_key = Column(String(64), primary_key=True)
+    payload = Column(JSON, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    stored_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class LLMResponseCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+    
+    # sha256 of (model, system message, normalized prompt, temperature)
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 # Dependency
 def get_db():
@@ -87,6 +181,63 @@ def get_db():
     finally:
         db.close()
 
-# Create tables
-def create_tables():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def bulk_insert(db: AsyncSession, model, rows: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Insert rows (dicts of column values) and return them as ORM objects, in
+    order, with ids and defaults filled in via RETURNING. On PostgreSQL this
+    is a single multi-row INSERT ... RETURNING. SQLite can't promise RETURNING
+    order for multi-row inserts, so SQLAlchemy sends one in-process INSERT
+    ... RETURNING per row there. Dialects without RETURNING get add_all and
+    flush instead. Either way no row is read back with a SELECT. The caller
+    commits.
+    """
+    if not rows:
+        return []
+    if db.bind.dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = await db.scalars(insert(model).returning(model, sort_by_parameter_order=True), rows)
+        return list(result)
+    objects = [model(**row) for row in rows]
+    db.add_all(objects)
+    await db.flush()
+    return objects
+
+# Schema migrations
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Schema as created by the old create_tables(), before migrations existed
+BASELINE_REVISION = "0001_baseline"
+
+def get_alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+def run_migrations() -> None:
+    """
+    Upgrade the schema to the latest migration. Databases created by the old
+    create_tables() have no alembic_version table, so they are stamped at the
+    baseline first.
+    """
+    config = get_alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        print(f"Existing schema without migration history; stamping {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+def check_schema_current() -> None:
+    """
+    Fail fast when migrations are applied out of band but the database is
+    behind the code, instead of every query on a new column failing.
+    """
+    heads = set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the code expects "
+            f"{', '.join(sorted(heads))}; run `alembic upgrade head` in backend/ before starting"
+        )
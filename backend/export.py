@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, List
+from sqlalchemy import Select
+from database import AsyncSessionLocal
+from config import settings
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _csv_value(value: Any) -> Any:
+    # Lists (visual_elements) stay lossless as JSON inside the cell
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if value is None:
+        return ""
+    return _json_value(value)
+
+async def stream_export(query: Select, columns: List[str], fmt: str) -> AsyncIterator[str]:
+    """
+    Yield query's rows as NDJSON lines or CSV. Rows come through a
+    server-side cursor in batches of ideas_export_batch_size, and each batch
+    is encoded and sent before the next is fetched, so memory use doesn't
+    grow with the number of ideas. Runs in its own session because the
+    response outlives the request's dependencies.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.ideas_export_batch_size))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([[_csv_value(value) for value in row] for row in rows])
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({name: _json_value(value) for name, value in zip(columns, row)}) + "\n"
+                    for row in rows
+                )
@@ -0,0 +1,172 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from database import AsyncSessionLocal, CreatorProfile
+from analysis import analyze_and_store_profile
+from services.qloo_service import QlooService
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Per-domain progress states
+DOMAIN_PENDING = "pending"
+DOMAIN_DONE = "done"
+DOMAIN_ERROR = "error"
+DOMAIN_SKIPPED = "skipped"
+
+class JobQueueFull(Exception):
+    pass
+
+class AnalysisJob:
+    """In-memory record of one background /analyze-audience run."""
+
+    def __init__(self, user_id: int, profile_id: int, incremental: bool = False):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.profile_id = profile_id
+        self.incremental = incremental
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.domains: Dict[str, str] = {domain: DOMAIN_PENDING for domain in QlooService.DOMAIN_TO_FILTER_TYPE}
+        self.domain_timings_ms: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def on_progress(self, event: str, data: Dict[str, Any]) -> None:
+        if event == "entities_resolved":
+            self.stage = "fetching_insights" if data.get("entity_ids") else "no_entities"
+        elif event == "domain_complete":
+            self.domains[data["domain"]] = DOMAIN_DONE if data.get("ok") else DOMAIN_ERROR
+            self.domain_timings_ms[data["domain"]] = data.get("elapsed_ms")
+
+    def settle_domains(self) -> None:
+        """
+        Fill in domains that sent no progress event (e.g. a stored analysis
+        was reused) from the result; those missing from it were skipped.
+        """
+        taste_profile = (self.result or {}).get("taste_profile") or {}
+        for domain, state in self.domains.items():
+            if state != DOMAIN_PENDING:
+                continue
+            result = taste_profile.get(domain)
+            if result is None:
+                self.domains[domain] = DOMAIN_SKIPPED
+            elif isinstance(result, dict) and result.get("error"):
+                self.domains[domain] = DOMAIN_ERROR
+            else:
+                self.domains[domain] = DOMAIN_DONE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "creator_profile_id": self.profile_id,
+            "status": self.status,
+            "stage": self.stage,
+            "domains": self.domains,
+            "domain_timings_ms": self.domain_timings_ms,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class AnalysisJobQueue:
+    """
+    Local worker pool for background audience analysis. Jobs are queued
+    in-process and picked up by a fixed number of asyncio workers, so no
+    external broker is needed. Only the most recent finished jobs are kept.
+    """
+
+    def __init__(self, qloo_service: QlooService, workers: int, max_queued: int, max_finished: int):
+        self.qloo_service = qloo_service
+        self.worker_count = max(1, workers)
+        self.max_finished = max_finished
+        self._queue: "asyncio.Queue[AnalysisJob]" = asyncio.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, user_id: int, profile_id: int, incremental: bool = False) -> AnalysisJob:
+        job = AnalysisJob(user_id, profile_id, incremental)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull()
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str, user_id: int) -> Optional[AnalysisJob]:
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.worker_count, "queue_depth": self._queue.qsize(), "jobs": counts}
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: AnalysisJob) -> None:
+        job.status = RUNNING
+        job.stage = "resolving_entities"
+        job.started_at = datetime.utcnow()
+        try:
+            # Load and let go of the connection; the analysis stores its result itself
+            async with AsyncSessionLocal() as db:
+                profile = await db.scalar(select(CreatorProfile).where(
+                    CreatorProfile.id == job.profile_id,
+                    CreatorProfile.user_id == job.user_id
+                ))
+            if not profile:
+                raise LookupError("Creator profile not found")
+            job.result = await analyze_and_store_profile(
+                self.qloo_service, profile, on_progress=job.on_progress, incremental=job.incremental
+            )
+            job.settle_domains()
+            job.status = SUCCEEDED
+            job.stage = SUCCEEDED
+        except Exception as e:
+            print(f"Analysis job {job.id} failed: {e}")
+            job.status = FAILED
+            job.stage = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._prune()
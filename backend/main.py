@@ -2,33 +2,65 @@ print("MAIN.PY LOADED")
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import json
 import uvicorn
 
-from database import get_db, create_tables, User, CreatorProfile, ContentIdea, MonetizationIdea
+from database import get_async_db, bulk_insert, AsyncSessionLocal, run_migrations, check_schema_current, User, CreatorProfile, ContentIdea, MonetizationIdea
 from schemas import (
-    UserCreate, User as UserSchema, UserLogin, Token,
+    UserCreate, User as UserSchema, UserLogin, Token, AuthenticatedUser,
     CreatorProfileCreate, CreatorProfile as CreatorProfileSchema,
-    ContentIdeaCreate, ContentIdea as ContentIdeaSchema,
-    MonetizationIdeaCreate, MonetizationIdea as MonetizationIdeaSchema,
+    ContentIdeaCreate, ContentIdea as ContentIdeaSchema, ContentIdeaPartial,
+    MonetizationIdeaCreate, MonetizationIdea as MonetizationIdeaSchema, MonetizationIdeaPartial,
     AudienceAnalysisRequest, ContentGenerationRequest, MonetizationGenerationRequest,
-    AnalysisResponse, ContentGenerationResponse, MonetizationGenerationResponse
+    BatchContentGenerationRequest, BatchContentGenerationItem,
+    AnalysisResponse, ContentGenerationResponse, MonetizationGenerationResponse,
+    ContentIdeaFilter, MonetizationIdeaFilter, ContentIdeaBulkSave, ContentIdeaBulkDelete, MonetizationIdeaBulkSave, MonetizationIdeaBulkDelete,
+    AnalysisJobStatus, DashboardSummary
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_active_user
+    get_password_hash_async, verify_and_update_password_async, create_access_token,
+    get_current_active_user, password_hasher_stats, shutdown_password_hasher,
+    invalidate_cached_user, auth_cache_stats
 )
 from config import settings
 from services.qloo_service import QlooService
 from services.openai_service import OpenAIService
+from analysis import (
+    analyze_and_store_profile, analysis_single_flight, load_profile_for_generation, load_profiles_for_generation,
+    ANALYSIS_RECOMMENDATIONS
+)
+from dashboard import load_dashboard_summary
+from export import EXPORT_FORMATS, stream_export
+from pagination import NEXT_CURSOR_HEADER, parse_fields, to_naive_utc, keyset_page_query, split_page
+from jobs import AnalysisJobQueue, JobQueueFull, SUCCEEDED, FAILED
+from scheduler import ProfileRefreshScheduler
 
 # Initialize services
 qloo_service = QlooService()
 openai_service = OpenAIService()
+analysis_jobs = AnalysisJobQueue(
+    qloo_service,
+    workers=settings.analysis_job_workers,
+    max_queued=settings.analysis_job_max_queued,
+    max_finished=settings.analysis_job_max_finished
+)
+profile_refresh = ProfileRefreshScheduler(
+    qloo_service,
+    max_age_seconds=settings.profile_refresh_max_age_seconds,
+    interval_seconds=settings.profile_refresh_interval_seconds,
+    batch_size=settings.profile_refresh_batch_size,
+    min_headroom=settings.profile_refresh_min_headroom
+)
 
 # Create FastAPI app (ONLY ONCE)
 app = FastAPI(
@@ -44,10 +76,80 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Create database tables
-create_tables()
+def format_sse(event: str, data: str) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+def idea_filter_conditions(model, filters) -> list:
+    """WHERE clauses for the fields set on a ContentIdeaFilter/MonetizationIdeaFilter"""
+    conditions = []
+    for name, value in filters.model_dump(exclude_none=True).items():
+        if name == "saved":
+            conditions.append(model.is_saved == value)
+        elif name == "generated_after":
+            conditions.append(model.generated_at >= to_naive_utc(value))
+        elif name == "generated_before":
+            conditions.append(model.generated_at < to_naive_utc(value))
+        else:
+            conditions.append(getattr(model, name) == value)
+    return conditions
+
+def bulk_idea_conditions(model, selection, user_id: int) -> list:
+    """
+    WHERE clauses for a bulk idea action: always scoped to the user, plus
+    the listed ids and/or the filter fields that were set.
+    """
+    if selection.ids is None and selection.filter is None:
+        raise HTTPException(status_code=400, detail="Provide ids or filter to select ideas")
+    # An empty filter would match every idea the user has
+    if selection.filter is not None and not selection.filter.model_dump(exclude_none=True):
+        raise HTTPException(status_code=400, detail="filter must set at least one field")
+    if selection.ids is not None and len(selection.ids) > settings.ideas_bulk_max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A bulk action can list at most {settings.ideas_bulk_max_ids} ids; use a filter instead"
+        )
+    conditions = [model.user_id == user_id]
+    if selection.ids is not None:
+        conditions.append(model.id.in_(selection.ids))
+    if selection.filter is not None:
+        conditions += idea_filter_conditions(model, selection.filter)
+    return conditions
+
+async def bulk_save_ideas(db: AsyncSession, model, selection, user_id: int) -> int:
+    """One UPDATE for the whole selection; returns how many ideas changed state."""
+    conditions = bulk_idea_conditions(model, selection, user_id)
+    result = await db.execute(
+        update(model)
+        .where(*conditions, model.is_saved.is_not(selection.is_saved))
+        .values(is_saved=selection.is_saved)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+def export_response(model, columns: list, conditions: list, fmt: str, filename: str) -> StreamingResponse:
+    """Stream every matching idea, newest first, as an NDJSON or CSV download"""
+    query = (
+        select(*[getattr(model, name) for name in columns])
+        .where(*conditions)
+        .order_by(model.generated_at.desc(), model.id.desc())
+    )
+    return StreamingResponse(
+        stream_export(query, columns, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+async def bulk_delete_ideas(db: AsyncSession, model, selection, user_id: int) -> int:
+    """One DELETE for the whole selection; returns how many ideas were removed."""
+    conditions = bulk_idea_conditions(model, selection, user_id)
+    result = await db.execute(delete(model).where(*conditions).execution_options(synchronize_session=False))
+    await db.commit()
+    return result.rowcount
 
 # Print all registered routes on startup
 @app.on_event("startup")
@@ -57,6 +159,23 @@ async def startup_event():
         if hasattr(route, 'methods') and hasattr(route, 'path'):
             print(f"{list(route.methods)} {route.path}")
     print("=========================")
+    if settings.run_migrations_on_startup:
+        await asyncio.to_thread(run_migrations)
+    else:
+        await asyncio.to_thread(check_schema_current)
+    await analysis_jobs.start()
+    if settings.profile_refresh_enabled:
+        await profile_refresh.start()
+    # Load the tokenizer now rather than on the first generation request
+    await asyncio.to_thread(openai_service.prompt_builder.counter.load)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await analysis_jobs.stop()
+    await profile_refresh.stop()
+    await qloo_service.aclose()
+    await openai_service.aclose()
+    shutdown_password_hasher()
 
 # Simple test endpoint to verify routing
 @app.delete("/test-delete/{item_id}")
@@ -68,7 +187,7 @@ async def test_delete(item_id: int):
 @app.delete("/test-delete-auth/{item_id}")
 async def test_delete_auth(
     item_id: int,
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     print(f"[DEBUG] Authenticated test delete endpoint reached with item_id: {item_id}, user: {current_user.email}")
     return {"message": f"Authenticated test delete reached for item {item_id}, user: {current_user.email}"}
@@ -81,11 +200,28 @@ async def root():
         "description": "Taste Architect for Creators"
     }
 
+@app.get("/metrics")
+async def metrics():
+    """In-process cache and performance counters"""
+    return {
+        "keyword_cache": qloo_service.entity_cache.stats(),
+        "insights_cache": qloo_service.insights_cache.stats(),
+        "password_hasher": password_hasher_stats(),
+        "auth_cache": auth_cache_stats(),
+        "analysis_jobs": analysis_jobs.stats(),
+        "analysis_single_flight": analysis_single_flight.stats(),
+        "profile_refresh": profile_refresh.stats(),
+        "qloo_rate_limiter": qloo_service.rate_limiter.stats(),
+        "llm_cache": openai_service.response_cache.stats(),
+        "openai_usage": openai_service.usage.stats(),
+        "openai_concurrency": openai_service.concurrency_stats()
+    }
+
 @app.post("/register", response_model=UserSchema)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -93,27 +229,36 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_cached_user(db_user.email)
     return db_user
 
 @app.post("/token", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login and get access token"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    password_ok, new_hash = (False, None)
+    if user:
+        password_ok, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Transparently upgrade hashes made with outdated cost parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        invalidate_cached_user(user.email)
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -122,15 +267,22 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/me", response_model=UserSchema)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get current user information"""
-    return current_user
+    # The auth cache only carries id/email/is_active, so load the full row here
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 @app.post("/creator-profiles", response_model=CreatorProfileSchema)
 async def create_creator_profile(
     profile: CreatorProfileCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new creator profile"""
     db_profile = CreatorProfile(
@@ -145,30 +297,30 @@ async def create_creator_profile(
         audience_data=profile.audience_data
     )
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await db.refresh(db_profile)
     return db_profile
 
 @app.get("/creator-profiles", response_model=list[CreatorProfileSchema])
 async def get_creator_profiles(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all creator profiles for current user"""
-    profiles = db.query(CreatorProfile).filter(CreatorProfile.user_id == current_user.id).all()
+    profiles = (await db.scalars(select(CreatorProfile).where(CreatorProfile.user_id == current_user.id))).all()
     return profiles
 
 @app.get("/creator-profiles/{profile_id}", response_model=CreatorProfileSchema)
 async def get_creator_profile(
     profile_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific creator profile"""
-    profile = db.query(CreatorProfile).filter(
+    profile = await db.scalar(select(CreatorProfile).where(
         CreatorProfile.id == profile_id,
         CreatorProfile.user_id == current_user.id
-    ).first()
+    ))
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
     return profile
@@ -176,64 +328,61 @@ async def get_creator_profile(
 @app.delete("/creator-profiles/{profile_id}", response_model=dict)
 async def delete_creator_profile(
     profile_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a creator profile"""
-    profile = db.query(CreatorProfile).filter(
+    profile = await db.scalar(select(CreatorProfile).where(
         CreatorProfile.id == profile_id,
         CreatorProfile.user_id == current_user.id
-    ).first()
+    ))
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
-    db.delete(profile)
-    db.commit()
+    await db.delete(profile)
+    await db.commit()
     return {"success": True, "message": "Profile deleted"}
 
 @app.put("/creator-profiles/{profile_id}", response_model=CreatorProfileSchema)
 async def update_creator_profile(
     profile_id: int,
     profile_update: CreatorProfileCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a creator profile"""
-    profile = db.query(CreatorProfile).filter(
+    profile = await db.scalar(select(CreatorProfile).where(
         CreatorProfile.id == profile_id,
         CreatorProfile.user_id == current_user.id
-    ).first()
+    ))
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
+    # Only touch fields that changed, so an unchanged JSON column isn't rewritten
     for field, value in profile_update.dict().items():
-        setattr(profile, field, value)
-    db.commit()
-    db.refresh(profile)
+        if getattr(profile, field) != value:
+            setattr(profile, field, value)
+    await db.commit()
+    await db.refresh(profile)
     return profile
 
 @app.post("/analyze-audience", response_model=AnalysisResponse)
 async def analyze_audience(
     request: AudienceAnalysisRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Analyze audience using Qloo's Taste AI™"""
-    # Get creator profile
-    profile = db.query(CreatorProfile).filter(
+    # Get creator profile; the stored analysis is read by the analysis run itself
+    profile = await db.scalar(select(CreatorProfile).options(defer(CreatorProfile.taste_profile)).where(
         CreatorProfile.id == request.creator_profile_id,
         CreatorProfile.user_id == current_user.id
-    ).first()
+    ))
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
+    # Hand the connection back to the pool for the length of the Qloo chain
+    await db.close()
     
-    # Analyze audience taste
-    analysis_result = qloo_service.analyze_audience_taste(
-        audience_data=profile.audience_data,
-        keywords=profile.keywords
-    )
-    
-    # Update profile with taste analysis
-    profile.taste_profile = analysis_result
-    db.commit()
+    # Analyze audience taste and store it on the profile
+    analysis_result = await analyze_and_store_profile(qloo_service, profile, incremental=request.incremental)
 
     # The check below was too strict and caused failures on partial successes.
     # It is being removed to allow the application to proceed with incomplete data.
@@ -243,48 +392,87 @@ async def analyze_audience(
     #         detail="Could not retrieve a complete taste profile from the analysis service. Please try again later."
     #     )
 
-    # For the new structure, insights are embedded in the taste profile.
-    # We can provide some generic, high-level recommendations.
-    recommendations = [
-        "Leverage cross-domain interests for unique content mashups.",
-        "Align brand partnerships with the top taste affinities for authenticity.",
-        "Use the identified taste patterns to refine your content's aesthetic and tone."
-    ]
-    
     return AnalysisResponse(
         taste_profile=analysis_result,
-        recommendations=recommendations
+        recommendations=ANALYSIS_RECOMMENDATIONS
+    )
+
+@app.post("/analyze-audience/jobs", response_model=AnalysisJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job(
+    request: AudienceAnalysisRequest,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue an audience analysis in the background and return a pollable job id"""
+    profile_id = await db.scalar(select(CreatorProfile.id).where(
+        CreatorProfile.id == request.creator_profile_id,
+        CreatorProfile.user_id == current_user.id
+    ))
+    if not profile_id:
+        raise HTTPException(status_code=404, detail="Creator profile not found")
+    try:
+        job = analysis_jobs.submit(current_user.id, profile_id, request.incremental)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Analysis queue is full. Please try again shortly.")
+    return job.to_dict()
+
+@app.get("/analyze-audience/jobs/{job_id}", response_model=AnalysisJobStatus)
+async def get_analysis_job(
+    job_id: str,
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Get the status and per-domain progress of a background analysis"""
+    job = analysis_jobs.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job.to_dict()
+
+@app.get("/analyze-audience/jobs/{job_id}/result", response_model=AnalysisResponse)
+async def get_analysis_job_result(
+    job_id: str,
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Get the result of a finished background analysis"""
+    job = analysis_jobs.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Audience analysis failed: {job.error}")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Analysis job is still {job.status}")
+    return AnalysisResponse(
+        taste_profile=job.result,
+        recommendations=ANALYSIS_RECOMMENDATIONS
     )
 
 @app.post("/generate-content", response_model=ContentGenerationResponse)
 async def generate_content_ideas(
     request: ContentGenerationRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate personalized content ideas"""
     # Get creator profile
-    profile = db.query(CreatorProfile).filter(
-        CreatorProfile.id == request.creator_profile_id,
-        CreatorProfile.user_id == current_user.id
-    ).first()
+    profile = await load_profile_for_generation(db, request.creator_profile_id, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
     
-    if not profile.taste_profile:
+    if not profile.taste_summary:
         raise HTTPException(status_code=400, detail="Please analyze your audience first")
     
     # Generate content ideas
     # Pass the user's prompt (from additional_constraints) to the LLM
     user_prompt = request.additional_constraints or ""
-    ideas_data = openai_service.generate_content_ideas(
+    ideas_data = await openai_service.generate_content_ideas(
         niche_description=profile.niche_description,
-        taste_profile=profile.taste_profile,
+        taste_profile=None,
+        taste_summary=profile.taste_summary,
         content_type=request.content_type,
         brand_voice=profile.brand_voice,
         negative_keywords=profile.negative_keywords,
         additional_constraints=request.additional_constraints or "",
-        user_prompt=user_prompt
+        user_prompt=user_prompt,
+        bypass_cache=request.bypass_cache
     )
     # If OpenAI returns an error, propagate it to the frontend
     if isinstance(ideas_data, dict) and ideas_data.get("error"):
@@ -292,7 +480,7 @@ async def generate_content_ideas(
     if not ideas_data:
         raise HTTPException(status_code=503, detail="Content generation failed: No ideas returned. Please try again later.")
     # Save ideas to database
-    ideas = []
+    rows = []
     for idea_data in ideas_data:
         # Ensure visual_elements is always a list
         visual_elements = idea_data.get("visual_elements", [])
@@ -301,52 +489,225 @@ async def generate_content_ideas(
             visual_elements = [visual_elements] if visual_elements else []
         elif not isinstance(visual_elements, list):
             visual_elements = []
-        db_idea = ContentIdea(
-            user_id=current_user.id,
-            creator_profile_id=profile.id,
-            title=idea_data.get("title", ""),
-            concept=idea_data.get("concept", ""),
-            content_type=request.content_type,
-            visual_elements=visual_elements,
-            call_to_action=idea_data.get("call_to_action", ""),
-            why_it_works=idea_data.get("why_it_works", "")
-        )
-        db.add(db_idea)
-        ideas.append(db_idea)
-    db.commit()
-    # Refresh to get IDs
-    for idea in ideas:
-        db.refresh(idea)
+        rows.append({
+            "user_id": current_user.id,
+            "creator_profile_id": profile.id,
+            "title": idea_data.get("title", ""),
+            "concept": idea_data.get("concept", ""),
+            "content_type": request.content_type,
+            "visual_elements": visual_elements,
+            "call_to_action": idea_data.get("call_to_action", ""),
+            "why_it_works": idea_data.get("why_it_works", "")
+        })
+    # One INSERT ... RETURNING gives back ids and defaults, no per-row refresh
+    ideas = await bulk_insert(db, ContentIdea, rows)
+    await db.commit()
     return ContentGenerationResponse(
         ideas=ideas,
         total_generated=len(ideas)
     )
 
+@app.post("/generate-content/stream")
+async def stream_content_ideas(
+    request: ContentGenerationRequest,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream content ideas as server-sent events, saving each one as it arrives"""
+    profile = await load_profile_for_generation(db, request.creator_profile_id, current_user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Creator profile not found")
+    
+    if not profile.taste_summary:
+        raise HTTPException(status_code=400, detail="Please analyze your audience first")
+
+    user_id = current_user.id
+    profile_id = profile.id
+    ideas_stream = openai_service.stream_content_ideas(
+        niche_description=profile.niche_description,
+        taste_profile=None,
+        taste_summary=profile.taste_summary,
+        content_type=request.content_type,
+        brand_voice=profile.brand_voice,
+        negative_keywords=profile.negative_keywords,
+        additional_constraints=request.additional_constraints or "",
+        user_prompt=request.additional_constraints or ""
+    )
+
+    async def event_stream():
+        total = 0
+        # The request-scoped session may be closed before the body is sent, so use our own
+        async with AsyncSessionLocal() as stream_db:
+            try:
+                async for idea_data in ideas_stream:
+                    [db_idea] = await bulk_insert(stream_db, ContentIdea, [{
+                        "user_id": user_id,
+                        "creator_profile_id": profile_id,
+                        "title": idea_data.get("title", ""),
+                        "concept": idea_data.get("concept", ""),
+                        "content_type": request.content_type,
+                        "visual_elements": idea_data.get("visual_elements", []),
+                        "call_to_action": idea_data.get("call_to_action", ""),
+                        "why_it_works": idea_data.get("why_it_works", "")
+                    }])
+                    await stream_db.commit()
+                    total += 1
+                    yield format_sse("idea", ContentIdeaSchema.model_validate(db_idea).model_dump_json())
+            except Exception as e:
+                print(f"Content idea stream failed: {e}")
+                yield format_sse("error", json.dumps({"detail": f"Content generation failed: {e}"}))
+                return
+            finally:
+                # Frees the upstream request slot promptly if the client disconnects
+                await ideas_stream.aclose()
+        if total == 0:
+            yield format_sse("error", json.dumps({"detail": "Content generation failed: No ideas returned. Please try again later."}))
+            return
+        yield format_sse("done", json.dumps({"total_generated": total}))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate-content/batch")
+async def generate_content_batch(
+    request: BatchContentGenerationRequest,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Generate content ideas for many creator profiles in one call. Items run
+    concurrently (bounded by OPENAI_MAX_CONCURRENCY across the whole app) and
+    each result is streamed as an NDJSON line as soon as it finishes. All
+    ideas are then saved in one bulk insert and a final "done" line reports
+    their ids per item.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to generate")
+    if len(request.items) > settings.batch_generation_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {settings.batch_generation_max_items} items"
+        )
+
+    profiles = await load_profiles_for_generation(
+        db, [item.creator_profile_id for item in request.items], current_user.id
+    )
+    # Copy what the generations need; the request-scoped session is gone once streaming starts
+    profile_inputs = {
+        profile.id: {
+            "niche_description": profile.niche_description,
+            "taste_summary": profile.taste_summary,
+            "brand_voice": profile.brand_voice,
+            "negative_keywords": profile.negative_keywords,
+        }
+        for profile in profiles.values()
+    }
+    user_id = current_user.id
+
+    async def generate(index: int, item: BatchContentGenerationItem):
+        inputs = profile_inputs.get(item.creator_profile_id)
+        if inputs is None:
+            return index, item, None, "Creator profile not found"
+        if not inputs["taste_summary"]:
+            return index, item, None, "Please analyze your audience first"
+        try:
+            ideas_data = await openai_service.generate_content_ideas(
+                taste_profile=None,
+                content_type=item.content_type,
+                additional_constraints=item.additional_constraints or "",
+                user_prompt=item.additional_constraints or "",
+                bypass_cache=request.bypass_cache,
+                **inputs
+            )
+        except Exception as e:
+            return index, item, None, f"Content generation failed: {e}"
+        if not ideas_data:
+            return index, item, None, "Content generation failed: No ideas returned. Please try again later."
+        return index, item, ideas_data, None
+
+    async def result_stream():
+        tasks = [asyncio.create_task(generate(index, item)) for index, item in enumerate(request.items)]
+        rows = []
+        failed = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                index, item, ideas_data, error = await next_result
+                line = {"index": index, "creator_profile_id": item.creator_profile_id, "content_type": item.content_type}
+                if error:
+                    failed += 1
+                    line.update(status="error", detail=error)
+                else:
+                    ideas = []
+                    for idea_data in ideas_data:
+                        fields = {
+                            "title": idea_data.get("title", ""),
+                            "concept": idea_data.get("concept", ""),
+                            "content_type": item.content_type,
+                            "visual_elements": idea_data.get("visual_elements", []),
+                            "call_to_action": idea_data.get("call_to_action", ""),
+                            "why_it_works": idea_data.get("why_it_works", ""),
+                        }
+                        rows.append((index, {"user_id": user_id, "creator_profile_id": item.creator_profile_id, **fields}))
+                        ideas.append(fields)
+                    line.update(status="ok", ideas=ideas)
+                yield json.dumps(line) + "\n"
+        finally:
+            # Client went away: don't keep spending on generations nobody will read
+            for task in tasks:
+                task.cancel()
+
+        idea_ids = {}
+        if rows:
+            try:
+                async with AsyncSessionLocal() as batch_db:
+                    saved = await bulk_insert(batch_db, ContentIdea, [row for _, row in rows])
+                    await batch_db.commit()
+            except Exception as e:
+                print(f"Saving batch content ideas failed: {e}")
+                yield json.dumps({"status": "error", "detail": f"Saving ideas failed: {e}"}) + "\n"
+                return
+            for (index, _), idea in zip(rows, saved):
+                idea_ids.setdefault(index, []).append(idea.id)
+        yield json.dumps({
+            "status": "done",
+            "total_generated": len(rows),
+            "failed": failed,
+            "idea_ids": idea_ids,
+        }) + "\n"
+
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/generate-monetization", response_model=MonetizationGenerationResponse)
 async def generate_monetization_ideas(
     request: MonetizationGenerationRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate monetization ideas"""
     # Get creator profile
-    profile = db.query(CreatorProfile).filter(
-        CreatorProfile.id == request.creator_profile_id,
-        CreatorProfile.user_id == current_user.id
-    ).first()
+    profile = await load_profile_for_generation(db, request.creator_profile_id, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Creator profile not found")
     
-    if not profile.taste_profile:
+    if not profile.taste_summary:
         raise HTTPException(status_code=400, detail="Please analyze your audience first")
     
     # Generate monetization ideas
-    ideas_data = openai_service.generate_monetization_ideas(
+    ideas_data = await openai_service.generate_monetization_ideas(
         niche_description=profile.niche_description,
-        taste_profile=profile.taste_profile,
+        taste_profile=None,
+        taste_summary=profile.taste_summary,
         collaboration_type=request.collaboration_type or "sponsorship",
         brand_voice=profile.brand_voice,
-        negative_keywords=profile.negative_keywords
+        negative_keywords=profile.negative_keywords,
+        bypass_cache=request.bypass_cache
     )
     # If OpenAI returns an error, propagate it to the frontend
     if isinstance(ideas_data, dict) and ideas_data.get("error"):
@@ -354,140 +715,249 @@ async def generate_monetization_ideas(
     if not ideas_data:
         raise HTTPException(status_code=503, detail="Monetization generation failed: No ideas returned. Please try again later.")
     # Save ideas to database
-    ideas = []
-    for idea_data in ideas_data:
-        db_idea = MonetizationIdea(
-            user_id=current_user.id,
-            creator_profile_id=profile.id,
-            brand_name=idea_data["brand_name"],
-            collaboration_type=idea_data["collaboration_type"],
-            pitch_angle=idea_data["pitch_angle"],
-            taste_alignment=idea_data["taste_alignment"],
-            why_it_works=idea_data.get("why_it_works")
-        )
-        db.add(db_idea)
-        ideas.append(db_idea)
-    db.commit()
-    # Refresh to get IDs
-    for idea in ideas:
-        db.refresh(idea)
+    rows = [{
+        "user_id": current_user.id,
+        "creator_profile_id": profile.id,
+        "brand_name": idea_data["brand_name"],
+        "collaboration_type": idea_data["collaboration_type"],
+        "pitch_angle": idea_data["pitch_angle"],
+        "taste_alignment": idea_data["taste_alignment"],
+        "why_it_works": idea_data.get("why_it_works")
+    } for idea_data in ideas_data]
+    # One INSERT ... RETURNING gives back ids and defaults, no per-row refresh
+    ideas = await bulk_insert(db, MonetizationIdea, rows)
+    await db.commit()
     return MonetizationGenerationResponse(
         ideas=ideas,
         total_generated=len(ideas)
     )
 
-@app.get("/content-ideas", response_model=list[ContentIdeaSchema])
+@app.get("/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    recent: int = Query(3, ge=0, le=20, description="How many of the newest ideas of each kind to include"),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Idea counts per profile and type plus the newest ideas, without listing every idea"""
+    return await load_dashboard_summary(db, current_user.id, recent)
+
+@app.get(
+    "/content-ideas",
+    response_model=list[ContentIdeaPartial],
+    response_model_exclude_unset=True
+)
 async def get_content_ideas(
+    response: Response,
     saved: bool = False,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    creator_profile_id: Optional[int] = None,
+    content_type: Optional[str] = None,
+    generated_after: Optional[datetime] = None,
+    generated_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id and generated_at are always included"),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.ideas_page_default_limit, ge=1, le=settings.ideas_page_max_limit),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all content ideas, with an option to filter for only saved ideas"""
-    query = db.query(ContentIdea).filter(ContentIdea.user_id == current_user.id)
+    """
+    Get content ideas newest first, one page at a time, with an option to
+    filter for only saved ideas. The cursor for the next page is returned in
+    the X-Next-Cursor header.
+    """
+    columns = parse_fields(fields, list(ContentIdeaSchema.model_fields), always=("id", "generated_at"))
+    query = keyset_page_query(ContentIdea, columns, cursor, limit).where(ContentIdea.user_id == current_user.id)
     if saved:
-        query = query.filter(ContentIdea.is_saved == True)
-    
-    ideas = query.order_by(ContentIdea.generated_at.desc()).all()
+        query = query.where(ContentIdea.is_saved == True)
+    if creator_profile_id is not None:
+        query = query.where(ContentIdea.creator_profile_id == creator_profile_id)
+    if content_type:
+        query = query.where(ContentIdea.content_type == content_type)
+    if generated_after:
+        query = query.where(ContentIdea.generated_at >= to_naive_utc(generated_after))
+    if generated_before:
+        query = query.where(ContentIdea.generated_at < to_naive_utc(generated_before))
+
+    ideas, next_cursor = split_page((await db.execute(query)).all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     # Defensive: ensure visual_elements is always a list for each idea
-    for idea in ideas:
-        if not isinstance(idea.visual_elements, list):
-            if isinstance(idea.visual_elements, str):
-                # If it's an empty string or string, set to []
-                idea.visual_elements = []
-            elif idea.visual_elements is None:
-                idea.visual_elements = []
-            else:
-                try:
-                    # Try to coerce to list if possible
-                    idea.visual_elements = list(idea.visual_elements)
-                except Exception:
-                    idea.visual_elements = []
+    if "visual_elements" in columns:
+        for idea in ideas:
+            if not isinstance(idea["visual_elements"], list):
+                idea["visual_elements"] = []
     return ideas
 
+@app.get("/content-ideas/export")
+async def export_content_ideas(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: ContentIdeaFilter = Depends(),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Download all of the user's content ideas (optionally filtered) as NDJSON or CSV"""
+    conditions = [ContentIdea.user_id == current_user.id] + idea_filter_conditions(ContentIdea, filters)
+    return export_response(ContentIdea, list(ContentIdeaSchema.model_fields), conditions, format, "content-ideas")
+
+@app.post("/content-ideas/bulk-save", response_model=dict)
+async def bulk_save_content_ideas(
+    request: ContentIdeaBulkSave,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Save or unsave many content ideas at once"""
+    updated = await bulk_save_ideas(db, ContentIdea, request, current_user.id)
+    return {"success": True, "updated": updated}
+
+@app.post("/content-ideas/bulk-delete", response_model=dict)
+async def bulk_delete_content_ideas(
+    request: ContentIdeaBulkDelete,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many content ideas at once"""
+    deleted = await bulk_delete_ideas(db, ContentIdea, request, current_user.id)
+    return {"success": True, "deleted": deleted}
+
 @app.put("/content-ideas/{idea_id}/save")
 async def save_content_idea(
     idea_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Save/unsave a content idea"""
-    idea = db.query(ContentIdea).filter(
+    idea = await db.scalar(select(ContentIdea).where(
         ContentIdea.id == idea_id,
         ContentIdea.user_id == current_user.id
-    ).first()
+    ))
     if not idea:
         raise HTTPException(status_code=404, detail="Content idea not found")
     
     idea.is_saved = not idea.is_saved
-    db.commit()
+    await db.commit()
     return {"message": f"Idea {'saved' if idea.is_saved else 'unsaved'} successfully"}
 
 @app.delete("/content-ideas/{idea_id}", response_model=dict)
 async def delete_content_idea(
     idea_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a content idea"""
-    idea = db.query(ContentIdea).filter(
+    idea = await db.scalar(select(ContentIdea).where(
         ContentIdea.id == idea_id,
         ContentIdea.user_id == current_user.id
-    ).first()
+    ))
     if not idea:
         raise HTTPException(status_code=404, detail="Content idea not found")
     
-    db.delete(idea)
-    db.commit()
+    await db.delete(idea)
+    await db.commit()
     return {"success": True, "message": "Content idea deleted successfully"}
 
-@app.get("/monetization-ideas", response_model=list[MonetizationIdeaSchema])
+@app.get(
+    "/monetization-ideas",
+    response_model=list[MonetizationIdeaPartial],
+    response_model_exclude_unset=True
+)
 async def get_monetization_ideas(
+    response: Response,
     saved: bool = False,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    creator_profile_id: Optional[int] = None,
+    collaboration_type: Optional[str] = None,
+    generated_after: Optional[datetime] = None,
+    generated_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id and generated_at are always included"),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.ideas_page_default_limit, ge=1, le=settings.ideas_page_max_limit),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all monetization ideas, with an option to filter for only saved ideas"""
-    query = db.query(MonetizationIdea).filter(MonetizationIdea.user_id == current_user.id)
+    """
+    Get monetization ideas newest first, one page at a time, with an option
+    to filter for only saved ideas. The cursor for the next page is returned
+    in the X-Next-Cursor header.
+    """
+    columns = parse_fields(fields, list(MonetizationIdeaSchema.model_fields), always=("id", "generated_at"))
+    query = keyset_page_query(MonetizationIdea, columns, cursor, limit).where(MonetizationIdea.user_id == current_user.id)
     if saved:
-        query = query.filter(MonetizationIdea.is_saved == True)
+        query = query.where(MonetizationIdea.is_saved == True)
+    if creator_profile_id is not None:
+        query = query.where(MonetizationIdea.creator_profile_id == creator_profile_id)
+    if collaboration_type:
+        query = query.where(MonetizationIdea.collaboration_type == collaboration_type)
+    if generated_after:
+        query = query.where(MonetizationIdea.generated_at >= to_naive_utc(generated_after))
+    if generated_before:
+        query = query.where(MonetizationIdea.generated_at < to_naive_utc(generated_before))
 
-    ideas = query.order_by(MonetizationIdea.generated_at.desc()).all()
+    ideas, next_cursor = split_page((await db.execute(query)).all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return ideas
 
+@app.get("/monetization-ideas/export")
+async def export_monetization_ideas(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: MonetizationIdeaFilter = Depends(),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Download all of the user's monetization ideas (optionally filtered) as NDJSON or CSV"""
+    conditions = [MonetizationIdea.user_id == current_user.id] + idea_filter_conditions(MonetizationIdea, filters)
+    return export_response(MonetizationIdea, list(MonetizationIdeaSchema.model_fields), conditions, format, "monetization-ideas")
+
+@app.post("/monetization-ideas/bulk-save", response_model=dict)
+async def bulk_save_monetization_ideas(
+    request: MonetizationIdeaBulkSave,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Save or unsave many monetization ideas at once"""
+    updated = await bulk_save_ideas(db, MonetizationIdea, request, current_user.id)
+    return {"success": True, "updated": updated}
+
+@app.post("/monetization-ideas/bulk-delete", response_model=dict)
+async def bulk_delete_monetization_ideas(
+    request: MonetizationIdeaBulkDelete,
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete many monetization ideas at once"""
+    deleted = await bulk_delete_ideas(db, MonetizationIdea, request, current_user.id)
+    return {"success": True, "deleted": deleted}
+
 @app.put("/monetization-ideas/{idea_id}/save")
 async def save_monetization_idea(
     idea_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Save/unsave a monetization idea"""
-    idea = db.query(MonetizationIdea).filter(
+    idea = await db.scalar(select(MonetizationIdea).where(
         MonetizationIdea.id == idea_id,
         MonetizationIdea.user_id == current_user.id
-    ).first()
+    ))
     if not idea:
         raise HTTPException(status_code=404, detail="Monetization idea not found")
     
     idea.is_saved = not idea.is_saved
-    db.commit()
+    await db.commit()
     return {"message": f"Idea {'saved' if idea.is_saved else 'unsaved'} successfully"}
 
 @app.delete("/monetization-ideas/{idea_id}", response_model=dict)
 async def delete_monetization_idea(
     idea_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a monetization idea"""
-    idea = db.query(MonetizationIdea).filter(
+    idea = await db.scalar(select(MonetizationIdea).where(
         MonetizationIdea.id == idea_id,
         MonetizationIdea.user_id == current_user.id
-    ).first()
+    ))
     if not idea:
         raise HTTPException(status_code=404, detail="Monetization idea not found")
     
-    db.delete(idea)
-    db.commit()
+    await db.delete(idea)
+    await db.commit()
     return {"success": True, "message": "Monetization idea deleted successfully"}
 
 if __name__ == "__main__":
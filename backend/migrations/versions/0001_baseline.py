@@ -0,0 +1,85 @@
+"""Baseline schema, as created by the old create_tables()
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("email", sa.String),
+        sa.Column("username", sa.String),
+        sa.Column("hashed_password", sa.String),
+        sa.Column("is_active", sa.Boolean),
+        sa.Column("created_at", sa.DateTime),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "creator_profiles",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("profile_name", sa.String, nullable=False),
+        sa.Column("niche_description", sa.String, nullable=False),
+        sa.Column("keywords", sa.JSON, nullable=False),
+        sa.Column("brand_voice", sa.String, nullable=True),
+        sa.Column("negative_keywords", sa.JSON, nullable=True),
+        sa.Column("social_platform", sa.String, nullable=False),
+        sa.Column("social_handle", sa.String, nullable=False),
+        sa.Column("audience_data", sa.Text),
+        sa.Column("taste_profile", sa.JSON),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    op.create_index("ix_creator_profiles_id", "creator_profiles", ["id"])
+
+    op.create_table(
+        "content_ideas",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("creator_profile_id", sa.Integer, sa.ForeignKey("creator_profiles.id")),
+        sa.Column("title", sa.String),
+        sa.Column("concept", sa.Text),
+        sa.Column("content_type", sa.String),
+        sa.Column("visual_elements", sa.JSON),
+        sa.Column("call_to_action", sa.String),
+        sa.Column("why_it_works", sa.Text, nullable=True),
+        sa.Column("is_saved", sa.Boolean),
+        sa.Column("generated_at", sa.DateTime),
+    )
+    op.create_index("ix_content_ideas_id", "content_ideas", ["id"])
+    op.create_index("ix_content_ideas_title", "content_ideas", ["title"])
+
+    op.create_table(
+        "monetization_ideas",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("creator_profile_id", sa.Integer, sa.ForeignKey("creator_profiles.id")),
+        sa.Column("brand_name", sa.String),
+        sa.Column("collaboration_type", sa.String),
+        sa.Column("pitch_angle", sa.Text),
+        sa.Column("taste_alignment", sa.Text),
+        sa.Column("why_it_works", sa.Text, nullable=True),
+        sa.Column("is_saved", sa.Boolean),
+        sa.Column("generated_at", sa.DateTime),
+    )
+    op.create_index("ix_monetization_ideas_id", "monetization_ideas", ["id"])
+
+
+def downgrade():
+    op.drop_table("monetization_ideas")
+    op.drop_table("content_ideas")
+    op.drop_table("creator_profiles")
+    op.drop_table("users")
@@ -0,0 +1,75 @@
+"""Cache tables, creator_profiles.taste_summary and idea batch_custom_id
+
+These were added while the schema was still managed by create_tables(),
+which creates missing tables but never adds columns. Any of them may
+already exist, so each step checks first.
+
+Revision ID: 0002_caches_summary_batch_ids
+Revises: 0001_baseline
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_caches_summary_batch_ids"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "keyword_entity_cache" not in tables:
+        op.create_table(
+            "keyword_entity_cache",
+            sa.Column("keyword", sa.String, primary_key=True),
+            sa.Column("entity_id", sa.String, nullable=True),
+            sa.Column("resolved_at", sa.DateTime),
+        )
+        op.create_index("ix_keyword_entity_cache_resolved_at", "keyword_entity_cache", ["resolved_at"])
+
+    if "insights_cache" not in tables:
+        op.create_table(
+            "insights_cache",
+            sa.Column("cache_key", sa.String(64), primary_key=True),
+            sa.Column("payload", sa.JSON, nullable=False),
+            sa.Column("size_bytes", sa.Integer, nullable=False),
+            sa.Column("stored_at", sa.DateTime),
+        )
+        op.create_index("ix_insights_cache_stored_at", "insights_cache", ["stored_at"])
+
+    if "llm_response_cache" not in tables:
+        op.create_table(
+            "llm_response_cache",
+            sa.Column("cache_key", sa.String(64), primary_key=True),
+            sa.Column("model", sa.String, nullable=False),
+            sa.Column("response", sa.JSON, nullable=False),
+            sa.Column("created_at", sa.DateTime),
+        )
+        op.create_index("ix_llm_response_cache_created_at", "llm_response_cache", ["created_at"])
+
+    profile_columns = {column["name"] for column in inspector.get_columns("creator_profiles")}
+    if "taste_summary" not in profile_columns:
+        op.add_column("creator_profiles", sa.Column("taste_summary", sa.JSON, nullable=True))
+
+    for table in ("content_ideas", "monetization_ideas"):
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "batch_custom_id" not in columns:
+            op.add_column(table, sa.Column("batch_custom_id", sa.String, nullable=True))
+        indexes = {index["name"] for index in inspector.get_indexes(table)}
+        if f"ix_{table}_batch_custom_id" not in indexes:
+            op.create_index(f"ix_{table}_batch_custom_id", table, ["batch_custom_id"], unique=True)
+
+
+def downgrade():
+    for table in ("monetization_ideas", "content_ideas"):
+        op.drop_index(f"ix_{table}_batch_custom_id", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("batch_custom_id")
+    with op.batch_alter_table("creator_profiles") as batch:
+        batch.drop_column("taste_summary")
+    op.drop_table("llm_response_cache")
+    op.drop_table("insights_cache")
+    op.drop_table("keyword_entity_cache")
@@ -0,0 +1,38 @@
+"""Composite and partial indexes for the idea lists and profile lookups
+
+Revision ID: 0003_idea_and_profile_indexes
+Revises: 0002_caches_summary_batch_ids
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_idea_and_profile_indexes"
+down_revision = "0002_caches_summary_batch_ids"
+branch_labels = None
+depends_on = None
+
+IDEA_TABLES = ("content_ideas", "monetization_ideas")
+
+
+def upgrade():
+    op.create_index("ix_creator_profiles_user_id_id", "creator_profiles", ["user_id", "id"])
+    for table in IDEA_TABLES:
+        # Newest-first lists per user; id breaks ties for the keyset cursor
+        op.create_index(f"ix_{table}_user_id_generated_at", table, ["user_id", "generated_at", "id"])
+        # Saved-only lists: a partial index holding just the saved rows
+        op.create_index(
+            f"ix_{table}_saved_user_id_generated_at", table, ["user_id", "generated_at", "id"],
+            postgresql_where=sa.text("is_saved"),
+            sqlite_where=sa.text("is_saved = 1"),
+        )
+        # creator_profile_id filters and profile deletes
+        op.create_index(f"ix_{table}_creator_profile_id_generated_at", table, ["creator_profile_id", "generated_at", "id"])
+
+
+def downgrade():
+    for table in IDEA_TABLES:
+        op.drop_index(f"ix_{table}_creator_profile_id_generated_at", table_name=table)
+        op.drop_index(f"ix_{table}_saved_user_id_generated_at", table_name=table)
+        op.drop_index(f"ix_{table}_user_id_generated_at", table_name=table)
+    op.drop_index("ix_creator_profiles_user_id_id", table_name="creator_profiles")
@@ -0,0 +1,28 @@
+"""creator_profiles.analysis_key and analyzed_at
+
+Record which keyword set the stored taste profile was analyzed for and
+when that analysis started, so concurrent analyses can be coalesced and
+an older analysis never overwrites a newer one.
+
+Revision ID: 0004_profile_analysis_state
+Revises: 0003_idea_and_profile_indexes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_profile_analysis_state"
+down_revision = "0003_idea_and_profile_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("creator_profiles", sa.Column("analysis_key", sa.String(64), nullable=True))
+    op.add_column("creator_profiles", sa.Column("analyzed_at", sa.DateTime, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("creator_profiles") as batch:
+        batch.drop_column("analyzed_at")
+        batch.drop_column("analysis_key")
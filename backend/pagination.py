@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Select, select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Timestamps are stored as naive UTC. Query values with a Z or offset
+    (as sent by toISOString()) are converted, since asyncpg rejects
+    comparing aware datetimes with naive columns.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(generated_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the row (generated_at, id)."""
+    raw = json.dumps([generated_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        generated_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(generated_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], always: Sequence[str]) -> List[str]:
+    """
+    Columns to load for a fields= projection, in allowed order. Fields in
+    always (the cursor columns) are included even if not asked for.
+    """
+    if not fields:
+        return list(allowed)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in allowed if name in requested or name in always]
+
+def keyset_page_query(model, columns: List[str], cursor: Optional[str], limit: int) -> Select:
+    """
+    Newest-first page of model over the given columns, continuing after
+    cursor. One extra row is fetched so callers can tell if there is a next page.
+    """
+    query = select(*[getattr(model, name) for name in columns])
+    if cursor:
+        generated_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.generated_at, model.id) < tuple_(generated_at, row_id))
+    return query.order_by(model.generated_at.desc(), model.id.desc()).limit(limit + 1)
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Turn fetched rows into dicts and the cursor for the next page (None on the last page)."""
+    items = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["generated_at"], last["id"])
+    return items, next_cursor
@@ -0,0 +1,127 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import or_, select
+from sqlalchemy.orm import load_only
+from database import AsyncSessionLocal, CreatorProfile
+from analysis import analyze_and_store_profile
+from services.qloo_service import QlooService
+
+class ProfileRefreshScheduler:
+    """
+    Background refresh of taste profiles older than max_age, so users
+    rarely trigger a full Qloo analysis themselves.
+
+    Every interval, up to batch_size of the stalest analyzed profiles are
+    refreshed (incrementally) one at a time, spread evenly over the
+    interval. Each refresh first waits until min_headroom tokens are free
+    in the shared Qloo rate limiter, so background work backs off while
+    users are running analyses. Profiles that were never analyzed are left
+    alone.
+    """
+
+    def __init__(
+        self,
+        qloo_service: QlooService,
+        max_age_seconds: int,
+        interval_seconds: int,
+        batch_size: int,
+        min_headroom: int
+    ):
+        self.qloo_service = qloo_service
+        self.max_age = timedelta(seconds=max_age_seconds)
+        self.interval = max(1, interval_seconds)
+        self.batch_size = max(1, batch_size)
+        self.min_headroom = min_headroom
+        self._task: Optional[asyncio.Task] = None
+        self.scans = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_scan_at: Optional[datetime] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        # Jitter the first scan so workers started together don't scan in lockstep
+        await asyncio.sleep(random.uniform(0, self.interval))
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Profile refresh scan failed: {e}")
+                await asyncio.sleep(self.interval)
+
+    def _stale_condition(self, now: datetime):
+        return or_(CreatorProfile.analyzed_at.is_(None), CreatorProfile.analyzed_at < now - self.max_age)
+
+    async def _due_profile_ids(self) -> List[int]:
+        async with AsyncSessionLocal() as db:
+            result = await db.scalars(
+                select(CreatorProfile.id)
+                .where(CreatorProfile.taste_profile.is_not(None), self._stale_condition(datetime.utcnow()))
+                .order_by(CreatorProfile.analyzed_at.asc().nulls_first(), CreatorProfile.id)
+                .limit(self.batch_size)
+            )
+            return list(result)
+
+    async def run_once(self) -> int:
+        """One scan: refresh the due profiles, taking about one interval. Returns how many were refreshed."""
+        self.scans += 1
+        self.last_scan_at = datetime.utcnow()
+        profile_ids = await self._due_profile_ids()
+        if not profile_ids:
+            await asyncio.sleep(self.interval)
+            return 0
+        print(f"Refreshing {len(profile_ids)} stale taste profiles in the background")
+        spacing = self.interval / len(profile_ids)
+        refreshed = 0
+        for profile_id in profile_ids:
+            await self.qloo_service.rate_limiter.wait_for_headroom(self.min_headroom)
+            if await self._refresh(profile_id):
+                refreshed += 1
+            await asyncio.sleep(spacing)
+        return refreshed
+
+    async def _refresh(self, profile_id: int) -> bool:
+        try:
+            async with AsyncSessionLocal() as db:
+                # Re-check: a user or another worker may have analyzed it since the scan
+                profile = await db.scalar(
+                    select(CreatorProfile)
+                    .options(load_only(CreatorProfile.id, CreatorProfile.keywords, CreatorProfile.audience_data))
+                    .where(CreatorProfile.id == profile_id, self._stale_condition(datetime.utcnow()))
+                )
+            if profile is None:
+                return False
+            # Domains older than max_age are re-fetched too, or a refresh could keep them all
+            await analyze_and_store_profile(
+                self.qloo_service, profile, incremental=True,
+                max_domain_age_seconds=int(self.max_age.total_seconds())
+            )
+            self.refreshed += 1
+            return True
+        except Exception as e:
+            self.failed += 1
+            print(f"Background refresh of profile {profile_id} failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "max_age_seconds": self.max_age.total_seconds(),
+            "scans": self.scans,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_scan_at": self.last_scan_at.isoformat() if self.last_scan_at else None,
+        }
@@ -28,6 +28,12 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+class AuthenticatedUser(BaseModel):
+    """Minimal user fields needed to authorize a request (cached per token subject)"""
+    id: int
+    email: str
+    is_active: bool
+
 # Creator Profile schemas
 class CreatorProfileBase(BaseModel):
     profile_name: str
@@ -74,6 +80,20 @@ class ContentIdea(ContentIdeaBase):
     class Config:
         from_attributes = True
 
+class ContentIdeaPartial(BaseModel):
+    """A content idea restricted to the fields= projection of a list request"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    creator_profile_id: Optional[int] = None
+    title: Optional[str] = None
+    concept: Optional[str] = None
+    content_type: Optional[str] = None
+    visual_elements: Optional[List[str]] = None
+    call_to_action: Optional[str] = None
+    why_it_works: Optional[str] = None
+    is_saved: Optional[bool] = None
+    generated_at: Optional[datetime] = None
+
 # Monetization Idea schemas
 class MonetizationIdeaBase(BaseModel):
     brand_name: str
@@ -94,25 +114,119 @@ class MonetizationIdea(MonetizationIdeaBase):
     class Config:
         from_attributes = True
 
+class MonetizationIdeaPartial(BaseModel):
+    """A monetization idea restricted to the fields= projection of a list request"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    creator_profile_id: Optional[int] = None
+    brand_name: Optional[str] = None
+    collaboration_type: Optional[str] = None
+    pitch_angle: Optional[str] = None
+    taste_alignment: Optional[str] = None
+    why_it_works: Optional[str] = None
+    generated_at: Optional[datetime] = None
+
+# Bulk idea actions
+class ContentIdeaFilter(BaseModel):
+    """Matches ideas like the list filters; saved=False matches only unsaved ideas"""
+    saved: Optional[bool] = None
+    creator_profile_id: Optional[int] = None
+    content_type: Optional[str] = None
+    generated_after: Optional[datetime] = None
+    generated_before: Optional[datetime] = None
+
+class MonetizationIdeaFilter(BaseModel):
+    """Matches ideas like the list filters; saved=False matches only unsaved ideas"""
+    saved: Optional[bool] = None
+    creator_profile_id: Optional[int] = None
+    collaboration_type: Optional[str] = None
+    generated_after: Optional[datetime] = None
+    generated_before: Optional[datetime] = None
+
+class ContentIdeaBulkDelete(BaseModel):
+    # Ideas matching ids and/or filter; at least one is required, and filter must set a field
+    ids: Optional[List[int]] = None
+    filter: Optional[ContentIdeaFilter] = None
+
+class ContentIdeaBulkSave(ContentIdeaBulkDelete):
+    is_saved: bool = True
+
+class MonetizationIdeaBulkDelete(BaseModel):
+    # Ideas matching ids and/or filter; at least one is required, and filter must set a field
+    ids: Optional[List[int]] = None
+    filter: Optional[MonetizationIdeaFilter] = None
+
+class MonetizationIdeaBulkSave(MonetizationIdeaBulkDelete):
+    is_saved: bool = True
+
 # Analysis schemas
 class AudienceAnalysisRequest(BaseModel):
     creator_profile_id: int
     additional_context: Optional[str] = None
+    # Opt in to keeping still-fresh domains of the last analysis and only
+    # re-fetching the rest; by default every domain is fetched again
+    incremental: bool = False
 
 class ContentGenerationRequest(BaseModel):
     creator_profile_id: int
     content_type: str
     additional_constraints: Optional[str] = None
+    # Skip the LLM response cache and force a fresh generation
+    bypass_cache: bool = False
+
+class BatchContentGenerationItem(BaseModel):
+    creator_profile_id: int
+    content_type: str
+    additional_constraints: Optional[str] = None
+
+class BatchContentGenerationRequest(BaseModel):
+    items: List[BatchContentGenerationItem]
+    # Skip the LLM response cache and force fresh generations
+    bypass_cache: bool = False
 
 class MonetizationGenerationRequest(BaseModel):
     creator_profile_id: int
     collaboration_type: Optional[str] = None
+    # Skip the LLM response cache and force a fresh generation
+    bypass_cache: bool = False
 
 # Response schemas
 class AnalysisResponse(BaseModel):
     taste_profile: Dict[str, Any]
     recommendations: List[str]
 
+class ProfileIdeaCounts(BaseModel):
+    id: int
+    profile_name: str
+    content_ideas: int
+    monetization_ideas: int
+
+class IdeaCounts(BaseModel):
+    total: int
+    saved: int
+    # content_type for content ideas, collaboration_type for monetization ideas
+    by_type: Dict[str, int]
+
+class DashboardSummary(BaseModel):
+    profile_count: int
+    profiles: List[ProfileIdeaCounts]
+    content_ideas: IdeaCounts
+    monetization_ideas: IdeaCounts
+    recent_content_ideas: List[ContentIdea]
+    recent_monetization_ideas: List[MonetizationIdea]
+
+class AnalysisJobStatus(BaseModel):
+    job_id: str
+    creator_profile_id: int
+    status: str
+    stage: str
+    domains: Dict[str, str]
+    domain_timings_ms: Dict[str, float]
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class ContentGenerationResponse(BaseModel):
     ideas: List[ContentIdea]
     total_generated: int
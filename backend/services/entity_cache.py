@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import SessionLocal, KeywordEntityCache
+from services.lru_cache import LRUCache, MISSING
+
+class EntityResolutionCache:
+    """
+    Shared keyword -> Qloo entity_id cache in front of the /search API.
+
+    Lookups go through an in-process LRU first, then the keyword_entity_cache
+    table. Keywords Qloo has no entity for are cached as None (negative
+    caching) with a shorter TTL. Cache failures are logged and treated as
+    misses so they never break an analysis.
+    """
+
+    def __init__(self):
+        self.ttl = timedelta(seconds=settings.keyword_cache_ttl_seconds)
+        self.negative_ttl = timedelta(seconds=settings.keyword_cache_negative_ttl_seconds)
+        self._memory = LRUCache(settings.keyword_cache_max_entries)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _ttl_for(self, entity_id: Optional[str]) -> timedelta:
+        return self.ttl if entity_id else self.negative_ttl
+
+    def get_many(self, keywords: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Return cached resolutions for the given normalized keywords. Keywords
+        missing from the result must be resolved against Qloo.
+        """
+        found: Dict[str, Optional[str]] = {}
+        remaining = []
+        for keyword in keywords:
+            entity_id = self._memory.get(keyword)
+            if entity_id is MISSING:
+                remaining.append(keyword)
+            else:
+                found[keyword] = entity_id
+
+        if remaining:
+            now = datetime.utcnow()
+            db = SessionLocal()
+            try:
+                rows = db.query(KeywordEntityCache).filter(KeywordEntityCache.keyword.in_(remaining)).all()
+                for row in rows:
+                    expires_at = row.resolved_at + self._ttl_for(row.entity_id)
+                    if expires_at <= now:
+                        continue
+                    found[row.keyword] = row.entity_id
+                    self._memory.set(row.keyword, row.entity_id, ttl_seconds=(expires_at - now).total_seconds())
+            except SQLAlchemyError as e:
+                print(f"  WARNING: Keyword cache lookup failed, falling back to Qloo search: {e}")
+            finally:
+                db.close()
+
+        for keyword in keywords:
+            if keyword not in found:
+                self.misses += 1
+            elif found[keyword] is None:
+                self.hits += 1
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+        return found
+
+    def set_many(self, resolved: Dict[str, Optional[str]]) -> None:
+        """Store fresh resolutions (None for 'no entity') in both layers."""
+        if not resolved:
+            return
+        now = datetime.utcnow()
+        for keyword, entity_id in resolved.items():
+            self._memory.set(keyword, entity_id, ttl_seconds=self._ttl_for(entity_id).total_seconds())
+
+        db = SessionLocal()
+        try:
+            for keyword, entity_id in resolved.items():
+                db.merge(KeywordEntityCache(keyword=keyword, entity_id=entity_id, resolved_at=now))
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"  WARNING: Could not persist keyword cache entries: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "memory": self._memory.stats(),
+        }
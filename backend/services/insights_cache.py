@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import SessionLocal, InsightsCacheEntry
+from services.lru_cache import LRUCache, MISSING
+
+# Lookup outcomes returned by InsightsCache.lookup
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+def make_insights_cache_key(entity_ids: List[str], filter_type: str, take: int) -> str:
+    """Canonical hash of an insights request: entity order and duplicates don't matter."""
+    canonical = json.dumps(
+        {"entities": sorted(set(entity_ids)), "filter.type": filter_type, "take": take},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class MemoryInsightsBackend:
+    """In-process LRU backend. Entries are dropped once they can no longer be served stale."""
+    blocking = False
+
+    def __init__(self, max_entries: int, retention_seconds: float):
+        self._lru = LRUCache(max_entries, ttl_seconds=retention_seconds)
+
+    def get(self, key: str) -> Optional[Tuple[Any, datetime]]:
+        entry = self._lru.get(key)
+        return None if entry is MISSING else entry
+
+    def set(self, key: str, payload: Any, stored_at: datetime, size_bytes: int) -> None:
+        self._lru.set(key, (payload, stored_at))
+
+class DatabaseInsightsBackend:
+    """
+    Table-backed backend (insights_cache), shared across workers on SQLite or
+    Postgres. Rows that can no longer be served stale are deleted on write,
+    at most once per purge interval.
+    """
+    # Uses the sync engine, so async callers must run it in a thread
+    blocking = True
+
+    def __init__(self, retention_seconds: float, purge_interval_seconds: float):
+        self.retention = timedelta(seconds=retention_seconds)
+        self.purge_interval = purge_interval_seconds
+        self._last_purge = time.monotonic()
+        self._purge_lock = threading.Lock()
+        self.purged = 0
+
+    def purge_expired(self) -> int:
+        """Delete rows older than the retention window; returns how many were removed."""
+        db = SessionLocal()
+        try:
+            result = db.execute(delete(InsightsCacheEntry).where(InsightsCacheEntry.stored_at < datetime.utcnow() - self.retention))
+            db.commit()
+            self.purged += result.rowcount
+            return result.rowcount
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _maybe_purge(self) -> None:
+        with self._purge_lock:
+            if time.monotonic() - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = time.monotonic()
+        try:
+            self.purge_expired()
+        except SQLAlchemyError as e:
+            # The entry itself was stored; a failed purge is retried next interval
+            print(f"  WARNING: Insights cache purge failed: {e}")
+
+    def get(self, key: str) -> Optional[Tuple[Any, datetime]]:
+        db = SessionLocal()
+        try:
+            row = db.get(InsightsCacheEntry, key)
+            return (row.payload, row.stored_at) if row else None
+        finally:
+            db.close()
+
+    def set(self, key: str, payload: Any, stored_at: datetime, size_bytes: int) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(InsightsCacheEntry(cache_key=key, payload=payload, stored_at=stored_at, size_bytes=size_bytes))
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._maybe_purge()
+
+def build_insights_backend(name: str):
+    """Map the INSIGHTS_CACHE_BACKEND setting to a backend instance (None disables caching)."""
+    name = (name or "").lower()
+    retention = settings.insights_cache_ttl_seconds + settings.insights_cache_stale_seconds
+    if name == "memory":
+        return MemoryInsightsBackend(settings.insights_cache_max_entries, retention)
+    if name in ("database", "sqlite", "postgres"):
+        return DatabaseInsightsBackend(retention, settings.insights_cache_purge_interval_seconds)
+    if name in ("none", "off", ""):
+        return None
+    raise ValueError(f"Unknown insights cache backend: {name!r}")
+
+class InsightsCache:
+    """
+    Content-addressed cache for Qloo v2/insights responses.
+
+    Entries younger than the TTL are served as fresh. Entries past the TTL but
+    inside the stale window are served immediately and flagged so the caller
+    can revalidate them in the background. Payloads larger than the per-entry
+    cap are never stored.
+    """
+
+    def __init__(self, backend=MISSING):
+        self.backend = build_insights_backend(settings.insights_cache_backend) if backend is MISSING else backend
+        self.ttl = timedelta(seconds=settings.insights_cache_ttl_seconds)
+        self.stale_window = timedelta(seconds=settings.insights_cache_stale_seconds)
+        self.max_entry_bytes = settings.insights_cache_max_entry_bytes
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.oversize_skips = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def lookup(self, key: str) -> Tuple[Any, str]:
+        """Return (payload, FRESH | STALE | MISS)."""
+        if not self.enabled:
+            return None, MISS
+        try:
+            entry = self.backend.get(key)
+        except SQLAlchemyError as e:
+            self.errors += 1
+            print(f"  WARNING: Insights cache lookup failed: {e}")
+            entry = None
+
+        if entry is not None:
+            payload, stored_at = entry
+            age = datetime.utcnow() - stored_at
+            if age <= self.ttl:
+                self.hits += 1
+                return payload, FRESH
+            if age <= self.ttl + self.stale_window:
+                self.stale_hits += 1
+                return payload, STALE
+        self.misses += 1
+        return None, MISS
+
+    def store(self, key: str, payload: Any) -> bool:
+        if not self.enabled:
+            return False
+        size_bytes = len(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        if size_bytes > self.max_entry_bytes:
+            self.oversize_skips += 1
+            return False
+        try:
+            self.backend.set(key, payload, datetime.utcnow(), size_bytes)
+        except SQLAlchemyError as e:
+            self.errors += 1
+            print(f"  WARNING: Could not store insights cache entry: {e}")
+            return False
+        return True
+
+    async def alookup(self, key: str) -> Tuple[Any, str]:
+        """lookup() for async callers; blocking backends run off the event loop."""
+        if self.enabled and self.backend.blocking:
+            return await asyncio.to_thread(self.lookup, key)
+        return self.lookup(key)
+
+    async def astore(self, key: str, payload: Any) -> bool:
+        if self.enabled and self.backend.blocking:
+            return await asyncio.to_thread(self.store, key, payload)
+        return self.store(key, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "oversize_skips": self.oversize_skips,
+            "errors": self.errors,
+        }
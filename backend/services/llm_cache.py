@@ -0,0 +1,173 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import SessionLocal, LLMResponseCacheEntry
+from services.lru_cache import LRUCache, MISSING
+
+def normalize_prompt(prompt: str) -> str:
+    """Trim per-line trailing whitespace and surrounding blank lines so cosmetic differences share a key."""
+    return "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+
+def make_llm_cache_key(model: str, system_message: str, prompt: str, temperature: float) -> str:
+    canonical = json.dumps(
+        {"model": model, "system": system_message, "prompt": normalize_prompt(prompt), "temperature": temperature},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Opt-in cache of parsed chat completions keyed on the normalized prompt.
+
+    Responses live in an in-process TTL LRU and, optionally, the
+    llm_response_cache table so they survive restarts. Identical concurrent
+    requests are coalesced onto one upstream call (single-flight) whether or
+    not caching is enabled. Error responses are never cached.
+    """
+
+    def __init__(self):
+        self.enabled = settings.llm_cache_enabled
+        self.persist = settings.llm_cache_persist
+        self.ttl = timedelta(seconds=settings.llm_cache_ttl_seconds)
+        self._memory = LRUCache(settings.llm_cache_max_entries, ttl_seconds=settings.llm_cache_ttl_seconds)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.purge_interval = settings.llm_cache_purge_interval_seconds
+        self._last_purge = time.monotonic()
+        self._purge_lock = threading.Lock()
+        self.purged = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            row = db.get(LLMResponseCacheEntry, key)
+            if row is None:
+                return None
+            remaining = (row.created_at + self.ttl - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                return None
+            self._memory.set(key, row.response, ttl_seconds=remaining)
+            return row.response
+        except SQLAlchemyError as e:
+            print(f"  WARNING: LLM cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _save(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(LLMResponseCacheEntry(cache_key=key, model=model, response=response, created_at=datetime.utcnow()))
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"  WARNING: Could not persist LLM cache entry: {e}")
+        finally:
+            db.close()
+        self._maybe_purge()
+
+    def purge_expired(self) -> int:
+        """Delete persisted responses past their TTL; returns how many were removed."""
+        db = SessionLocal()
+        try:
+            result = db.execute(delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.created_at < datetime.utcnow() - self.ttl))
+            db.commit()
+            self.purged += result.rowcount
+            return result.rowcount
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"  WARNING: LLM cache purge failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _maybe_purge(self) -> None:
+        """Purge on write, at most once per purge interval."""
+        with self._purge_lock:
+            if time.monotonic() - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = time.monotonic()
+        self.purge_expired()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        response = self._memory.get(key)
+        if response is not MISSING:
+            return response
+        if self.persist:
+            return await asyncio.to_thread(self._load, key)
+        return None
+
+    async def set(self, key: str, model: str, response: Dict[str, Any]) -> None:
+        self._memory.set(key, response)
+        if self.persist:
+            await asyncio.to_thread(self._save, key, model, response)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        model: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        bypass: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Return a cached response, join an identical in-flight request, or run
+        compute(). Every caller gets its own copy of the response. With
+        bypass=True the cache and in-flight requests are skipped, but a fresh
+        result still replaces the cached one.
+        """
+        if bypass:
+            self.bypassed += 1
+            response = await compute()
+            if self.enabled and not response.get("error"):
+                await self.set(key, model, response)
+            return copy.deepcopy(response)
+
+        if self.enabled:
+            cached = await self.get(key)
+            if cached is not None:
+                self.hits += 1
+                # Callers sanitize responses in place, so never hand out the cached object
+                return copy.deepcopy(cached)
+            self.misses += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            async def run():
+                try:
+                    response = await compute()
+                    if self.enabled and not response.get("error"):
+                        await self.set(key, model, response)
+                    return response
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.create_task(run())
+            self._inflight[key] = task
+        # shield: one caller disconnecting must not cancel the shared upstream call
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "purged": self.purged,
+            "in_flight": len(self._inflight),
+            "memory": self._memory.stats(),
+        }
@@ -1,33 +1,176 @@
+import asyncio
 import json
-from openai import OpenAI
+import re
+import time
+from contextlib import asynccontextmanager
+from openai import AsyncOpenAI
 from config import settings
-from typing import Dict, Any, List, Optional
+from services.llm_cache import LLMResponseCache, make_llm_cache_key
+from services.prompt_builder import PromptBuilder, TokenUsageTracker
+from services.taste_summary import resolve_taste_summary, format_content_profile, format_monetization_profile
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+class IdeasStreamParser:
+    """
+    Incrementally extracts complete objects from a streamed JSON document of
+    the form {"ideas": [{...}, {...}]} (or a bare top-level array), so each
+    idea can be used before the rest of the completion arrives.
+    """
+    IDEAS_ARRAY_START = re.compile(r'"ideas"\s*:\s*\[')
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add the next chunk of model output; returns any ideas it completed."""
+        self._buffer += text
+        completed: List[Dict[str, Any]] = []
+        if self._done:
+            return completed
+        if not self._in_array:
+            match = self.IDEAS_ARRAY_START.search(self._buffer)
+            if match:
+                self._pos = match.end()
+            elif self._buffer.lstrip().startswith("["):
+                self._pos = self._buffer.index("[") + 1
+            else:
+                return completed
+            self._in_array = True
+
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif ch == "}":
+                # A stray closing brace between ideas must not throw off the ones after it
+                if self._depth == 0:
+                    self._pos += 1
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(json.loads(buffer[self._object_start:self._pos + 1]))
+                    except json.JSONDecodeError:
+                        pass
+            elif ch == "]" and self._depth == 0:
+                self._done = True
+                self._pos += 1
+                break
+            self._pos += 1
+        return completed
 
 class OpenAIService:
+    SYSTEM_MESSAGE = "You are a world-class creative strategist and viral marketing expert for content creators."
+    CONTENT_IDEAS_PER_REQUEST = 5
+
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = "gpt-4o"
+        self.temperature = 0.7
+        self.response_cache = LLMResponseCache()
+        self.prompt_builder = PromptBuilder(
+            self.model,
+            max_input_tokens=settings.openai_max_input_tokens,
+            max_field_tokens=settings.openai_max_field_tokens
+        )
+        self.usage = TokenUsageTracker()
+        # Shared by every caller so batch generation cannot flood the API
+        self.max_concurrency = settings.openai_max_concurrency
+        self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        self._active_requests = 0
 
-    def _generate_chat_completion(self, prompt: str, response_format: str = "json_object") -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Release the client's connection pool (called on app shutdown)."""
+        await self.client.close()
+
+    async def _generate_chat_completion(
+        self,
+        prompt: str,
+        response_format: str = "json_object",
+        bypass_cache: bool = False,
+        usage_kind: str = "chat",
+        estimated_tokens: int = 0
+    ) -> Dict[str, Any]:
         if not settings.openai_api_key or settings.openai_api_key == "YOUR_OPENAI_API_KEY":
             return {"error": "OpenAI API key not configured"}
+        cache_key = make_llm_cache_key(self.model, self.SYSTEM_MESSAGE, prompt, self.temperature)
+        return await self.response_cache.get_or_compute(
+            cache_key,
+            self.model,
+            lambda: self._request_chat_completion(prompt, response_format, usage_kind, estimated_tokens),
+            bypass=bypass_cache
+        )
+
+    @asynccontextmanager
+    async def _request_slot(self):
+        """Hold one of the OPENAI_MAX_CONCURRENCY upstream request slots."""
+        async with self._request_slots:
+            self._active_requests += 1
+            try:
+                yield
+            finally:
+                self._active_requests -= 1
+
+    def concurrency_stats(self) -> Dict[str, int]:
+        return {"max_concurrency": self.max_concurrency, "active_requests": self._active_requests}
+
+    def chat_request_body(self, prompt: str, response_format: str = "json_object") -> Dict[str, Any]:
+        """Chat Completions parameters for a prompt; also the body of an offline batch request line."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": response_format},
+            "temperature": self.temperature,
+        }
+
+    async def _request_chat_completion(
+        self,
+        prompt: str,
+        response_format: str,
+        usage_kind: str = "chat",
+        estimated_tokens: int = 0
+    ) -> Dict[str, Any]:
         print("\n--- OpenAI Prompt Sent ---\n", prompt, "\n--- End Prompt ---\n")
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a world-class creative strategist and viral marketing expert for content creators."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": response_format},
-                temperature=0.7,
-            )
-            return json.loads(response.choices[0].message.content)
-        except Exception as e:
-            print(f"OpenAI API request failed: {e}")
-            return {"error": str(e)}
+        async with self._request_slot():
+            started = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(**self.chat_request_body(prompt, response_format))
+                self._record_usage(usage_kind, estimated_tokens, response.usage, started)
+                return json.loads(response.choices[0].message.content)
+            except Exception as e:
+                print(f"OpenAI API request failed: {e}")
+                return {"error": str(e)}
+
+    def _record_usage(self, kind: str, estimated_tokens: int, usage: Any, started: float) -> None:
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.usage.record(kind, estimated_tokens, prompt_tokens, completion_tokens, latency_ms)
+        print(f"OpenAI usage ({kind}): prompt={prompt_tokens} (estimated {estimated_tokens}) completion={completion_tokens} in {latency_ms}ms")
 
-    def generate_content_ideas(
+    def build_content_prompt(
         self,
         niche_description: str,
         taste_profile: Dict[str, Any],
@@ -35,100 +178,72 @@ class OpenAIService:
         brand_voice: str = "not specified",
         negative_keywords: Optional[List[str]] = None,
         additional_constraints: str = "",
-        user_prompt: str = ""
-    ) -> List[Dict[str, Any]]:
-        negative_keywords_prompt = f"Avoid: {', '.join(negative_keywords)}." if negative_keywords else ""
-        # Summarize and trim the taste_profile for the LLM (top 3 entities per domain, skip errors, remove analysis_notes)
-        def summarize_taste_profile(tp: Dict[str, Any]) -> Dict[str, Any]:
-            # Bulletproof: Only include allowed fields, never reference or mutate original dicts
-            if not tp:
-                return {}
-            taste = tp.get("taste_profile", tp)
-            summary = {}
-            if isinstance(taste, dict):
-                for domain, data in taste.items():
-                    if not isinstance(data, dict):
-                        continue
-                    if data.get("error"):
-                        continue
-                    entities = data.get("entities") or data.get("results")
-                    if isinstance(entities, list):
-                        trimmed_entities = []
-                        for e in entities[:3]:
-                            if not isinstance(e, dict) or not e.get("name"):
-                                continue
-                            # Only allowed fields: name, short_description, tags, popularity
-                            trimmed = {}
-                            trimmed["name"] = e.get("name")
-                            # Short description: prefer first value in short_descriptions, else fallback to short_description
-                            sd = None
-                            props = e.get("properties", {})
-                            sds = props.get("short_descriptions")
-                            if isinstance(sds, list) and sds and isinstance(sds[0], dict):
-                                sd = sds[0].get("value")
-                            elif isinstance(props.get("short_description"), str):
-                                sd = props.get("short_description")
-                            trimmed["short_description"] = sd
-                            # Tags: up to 3 tag names
-                            tags = e.get("tags")
-                            if isinstance(tags, list):
-                                trimmed["tags"] = [t.get("name") for t in tags[:3] if isinstance(t, dict) and t.get("name")]
-                            else:
-                                trimmed["tags"] = None
-                            trimmed["popularity"] = e.get("popularity")
-                            trimmed_entities.append(trimmed)
-                        summary[domain] = {"entities": trimmed_entities}
-            return summary
-
-        trimmed_profile = summarize_taste_profile(taste_profile)
-        # Format the profile as compact readable text (for both content and monetization prompts)
-        def format_profile(profile: Dict[str, Any]) -> str:
-            lines = []
-            for domain, data in profile.items():
-                # Section header for domain
-                lines.append(f"\n=== {domain.title()} ===")
-                for entity in data.get("entities", []):
-                    name = entity.get("name", "")
-                    desc = entity.get("short_description") or ""
-                    tags = entity.get("tags") or []
-                    pop = entity.get("popularity")
-                    # Modal-style: each field on its own line, clear labels
-                    lines.append(f"• Name: {name}")
-                    if desc:
-                        lines.append(f"  Description: {desc}")
-                    if tags:
-                        lines.append(f"  Tags: {', '.join(tags)}")
-                    if isinstance(pop, (int, float)):
-                        lines.append(f"  Popularity: {round(pop*100,1)}%")
-                    lines.append("")
-            return '\n'.join(lines)
-
-        profile_text = format_profile(trimmed_profile)
-        prompt = f"""
+        user_prompt: str = "",
+        taste_summary: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render the content-ideas prompt for a creator profile within the input
+        token budget. Returns the prompt and the prompt builder's report.
+        """
+        def render(f: Dict[str, str], profile_text: str) -> str:
+            negative_keywords_prompt = f"Avoid: {f['negative_keywords']}." if f["negative_keywords"] else ""
+            return f"""
 You are a world-class creative strategist for content creators.
 
-Niche: {niche_description}
-Brand Voice: {brand_voice}
+Niche: {f["niche_description"]}
+Brand Voice: {f["brand_voice"]}
 Audience Taste Profile:
 {profile_text}
 {negative_keywords_prompt}
 Content Type: {content_type}
-Constraints: {additional_constraints or "None"}
+Constraints: {f["additional_constraints"] or "None"}
 
-User's Request: {user_prompt}
+User's Request: {f["user_prompt"]}
 
 Instructions:
 - Use the above audience taste profile and the user's request to generate 5 content ideas.
 - For each idea, provide: title, concept, visual_elements (as a list), call_to_action, why_it_works (reference the audience taste profile).
 - Output: JSON with key 'ideas', value is a list of idea objects. Each idea object must have keys: title, concept, visual_elements (list), call_to_action, why_it_works.
         """
-        # Print prompt size in characters and tokens (approximate: 1 token ≈ 4 chars for English)
-        prompt_len = len(prompt)
-        approx_tokens = prompt_len // 4
-        print(f"\n--- OpenAI Prompt Sent to LLM (for content ideas) ---\n(Prompt size: {prompt_len} chars, ~{approx_tokens} tokens)\n" + prompt + "\n--- End Prompt ---\n")
-        response = self._generate_chat_completion(prompt)
+
+        fields = {
+            "niche_description": niche_description,
+            "brand_voice": brand_voice,
+            "negative_keywords": ", ".join(negative_keywords) if negative_keywords else "",
+            "additional_constraints": additional_constraints,
+            "user_prompt": user_prompt,
+        }
+        # Precomputed when the taste profile was analyzed; rebuilt only if missing or outdated
+        summary = resolve_taste_summary(taste_profile, taste_summary)
+        return self.prompt_builder.build(
+            self.SYSTEM_MESSAGE, render, fields, summary, "content_block", format_content_profile
+        )
+
+    async def generate_content_ideas(
+        self,
+        niche_description: str,
+        taste_profile: Dict[str, Any],
+        content_type: str,
+        brand_voice: str = "not specified",
+        negative_keywords: Optional[List[str]] = None,
+        additional_constraints: str = "",
+        user_prompt: str = "",
+        taste_summary: Optional[Dict[str, Any]] = None,
+        bypass_cache: bool = False
+    ) -> List[Dict[str, Any]]:
+        prompt, report = self.build_content_prompt(
+            niche_description, taste_profile, content_type, brand_voice,
+            negative_keywords, additional_constraints, user_prompt, taste_summary
+        )
+        print(f"\n--- OpenAI Prompt Sent to LLM (for content ideas) ---\n(Prompt size: {len(prompt)} chars, {report['input_tokens']} tokens, trimmed: {report})\n" + prompt + "\n--- End Prompt ---\n")
+        response = await self._generate_chat_completion(
+            prompt, bypass_cache=bypass_cache, usage_kind="content_ideas", estimated_tokens=report["input_tokens"]
+        )
         print("\n--- LLM Raw Response (for content ideas) ---\n" + json.dumps(response, indent=2) + "\n--- End LLM Response ---\n")
-        # Defensive: If LLM returns ideas with visual_elements as empty string or missing, fix it here
+        return self.parse_content_ideas(response)
+
+    def parse_content_ideas(self, response: Any) -> List[Dict[str, Any]]:
+        """Turn a parsed completion into at most CONTENT_IDEAS_PER_REQUEST sanitized content ideas."""
         # Handle both dict with 'ideas' key and list directly
         # Defensive: always return a list of ideas, and always fix visual_elements
         if isinstance(response, dict) and "ideas" in response:
@@ -137,102 +252,112 @@ Instructions:
             ideas = response
         else:
             ideas = []
-        required_keys = {"title", "concept", "visual_elements", "call_to_action", "why_it_works"}
         sanitized_ideas = []
         for idea in ideas:
-            if not isinstance(idea, dict):
+            sanitized = self._sanitize_content_idea(idea)
+            if sanitized is None:
                 continue
-            # Ensure all required keys exist
-            for key in required_keys:
-                if key not in idea:
-                    if key == "visual_elements":
-                        idea[key] = []
-                    else:
-                        idea[key] = ""
-            visual_elements = idea.get("visual_elements", None)
-            if visual_elements is None or (isinstance(visual_elements, str) and not visual_elements.strip()):
-                idea["visual_elements"] = []
-            elif isinstance(visual_elements, str):
-                idea["visual_elements"] = [visual_elements]
-            elif not isinstance(visual_elements, list):
-                idea["visual_elements"] = []
-            sanitized_ideas.append(idea)
-            if len(sanitized_ideas) == 5:
+            sanitized_ideas.append(sanitized)
+            if len(sanitized_ideas) == self.CONTENT_IDEAS_PER_REQUEST:
                 break
         return sanitized_ideas
 
-    def generate_monetization_ideas(
+    @staticmethod
+    def _sanitize_content_idea(idea: Any) -> Optional[Dict[str, Any]]:
+        """Defensive: ensure all required keys exist and visual_elements is always a list."""
+        if not isinstance(idea, dict):
+            return None
+        required_keys = {"title", "concept", "visual_elements", "call_to_action", "why_it_works"}
+        for key in required_keys:
+            if key not in idea:
+                if key == "visual_elements":
+                    idea[key] = []
+                else:
+                    idea[key] = ""
+        visual_elements = idea.get("visual_elements", None)
+        if visual_elements is None or (isinstance(visual_elements, str) and not visual_elements.strip()):
+            idea["visual_elements"] = []
+        elif isinstance(visual_elements, str):
+            idea["visual_elements"] = [visual_elements]
+        elif not isinstance(visual_elements, list):
+            idea["visual_elements"] = []
+        return idea
+
+    async def stream_content_ideas(
         self,
         niche_description: str,
         taste_profile: Dict[str, Any],
-        collaboration_type: str,
+        content_type: str,
         brand_voice: str = "not specified",
-        negative_keywords: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
-        negative_keywords_prompt = f"The creator wants to AVOID brands or topics related to: {', '.join(negative_keywords)}." if negative_keywords else ""
-
-        # Use the same summarization for monetization prompt
-        def summarize_taste_profile(tp: Dict[str, Any]) -> Dict[str, Any]:
-            # Bulletproof: Only include allowed fields, never reference or mutate original dicts
-            if not tp:
-                return {}
-            taste = tp.get("taste_profile", tp)
-            summary = {}
-            if isinstance(taste, dict):
-                for domain, data in taste.items():
-                    if not isinstance(data, dict):
-                        continue
-                    if data.get("error"):
+        negative_keywords: Optional[List[str]] = None,
+        additional_constraints: str = "",
+        user_prompt: str = "",
+        taste_summary: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream content ideas as the model writes them. Each idea is yielded,
+        sanitized, as soon as its object in the "ideas" array is complete.
+        Raises on API errors so callers can report them mid-stream.
+        """
+        if not settings.openai_api_key or settings.openai_api_key == "YOUR_OPENAI_API_KEY":
+            raise RuntimeError("OpenAI API key not configured")
+        prompt, report = self.build_content_prompt(
+            niche_description, taste_profile, content_type, brand_voice,
+            negative_keywords, additional_constraints, user_prompt, taste_summary
+        )
+        print(f"\n--- OpenAI Prompt Streamed to LLM (for content ideas) ---\n(Prompt size: {len(prompt)} chars, {report['input_tokens']} tokens)\n" + prompt + "\n--- End Prompt ---\n")
+        async with self._request_slot():
+            started = time.perf_counter()
+            stream = await self.client.chat.completions.create(
+                **self.chat_request_body(prompt),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            parser = IdeasStreamParser()
+            emitted = 0
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    # Sent as a final chunk with no choices
+                    self._record_usage("content_ideas_stream", report["input_tokens"], chunk.usage, started)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                for idea in parser.feed(delta):
+                    sanitized = self._sanitize_content_idea(idea)
+                    if sanitized is None:
                         continue
-                    entities = data.get("entities") or data.get("results")
-                    if isinstance(entities, list):
-                        trimmed_entities = []
-                        for e in entities[:3]:
-                            if not isinstance(e, dict) or not e.get("name"):
-                                continue
-                            trimmed = {}
-                            trimmed["name"] = e.get("name")
-                            sd = None
-                            props = e.get("properties", {})
-                            sds = props.get("short_descriptions")
-                            if isinstance(sds, list) and sds and isinstance(sds[0], dict):
-                                sd = sds[0].get("value")
-                            elif isinstance(props.get("short_description"), str):
-                                sd = props.get("short_description")
-                            trimmed["short_description"] = sd
-                            tags = e.get("tags")
-                            if isinstance(tags, list):
-                                trimmed["tags"] = [t.get("name") for t in tags[:3] if isinstance(t, dict) and t.get("name")]
-                            else:
-                                trimmed["tags"] = None
-                            trimmed["popularity"] = e.get("popularity")
-                            trimmed_entities.append(trimmed)
-                        summary[domain] = {"entities": trimmed_entities}
-            return summary
-
-        trimmed_profile = summarize_taste_profile(taste_profile)
-        def format_profile(profile: Dict[str, Any]) -> str:
-            lines = []
-            for domain, data in profile.items():
-                lines.append(f"{domain.title()}")
-                for entity in data.get("entities", []):
-                    name = entity.get("name", "")
-                    desc = entity.get("short_description") or ""
-                    tags = entity.get("tags") or []
-                    tags_str = f" [Tags: {', '.join(tags)}]" if tags else ""
-                    pop = entity.get("popularity")
-                    pop_str = f" (Popularity: {round(pop*100,1)}%)" if isinstance(pop, (int, float)) else ""
-                    lines.append(f"- {name}: {desc}{tags_str}{pop_str}")
-                lines.append("")
-            return '\n'.join(lines)
-
-        profile_text = format_profile(trimmed_profile)
-        prompt = f"""
+                    if emitted == self.CONTENT_IDEAS_PER_REQUEST:
+                        # The model is writing more ideas than asked for; stop paying for them
+                        await stream.close()
+                        return
+                    yield sanitized
+                    emitted += 1
+                # Otherwise keep reading the (short) tail so the usage chunk arrives
+
+
+    def build_monetization_prompt(
+        self,
+        niche_description: str,
+        taste_profile: Dict[str, Any],
+        collaboration_type: str,
+        brand_voice: str = "not specified",
+        negative_keywords: Optional[List[str]] = None,
+        taste_summary: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render the monetization-ideas prompt for a creator profile within the
+        input token budget. Returns the prompt and the prompt builder's report.
+        """
+        def render(f: Dict[str, str], profile_text: str) -> str:
+            negative_keywords_prompt = f"The creator wants to AVOID brands or topics related to: {f['negative_keywords']}." if f["negative_keywords"] else ""
+            return f"""
 Analyze the following creator profile and generate 3 innovative monetization ideas.
 
 Creator Profile:
-Niche: {niche_description}
-Brand Voice: {brand_voice}
+Niche: {f["niche_description"]}
+Brand Voice: {f["brand_voice"]}
 Audience Taste Profile:
 {profile_text}
 {negative_keywords_prompt}
@@ -247,10 +372,40 @@ The "why_it_works" is crucial. It must be a concise sentence explaining why this
 Output Format:
 Return a JSON object with a single key "ideas", which is a list of 3 idea objects. Each object must have the following keys: "brand_name", "collaboration_type", "pitch_angle", "taste_alignment", "why_it_works".
         """
-        prompt_len = len(prompt)
-        approx_tokens = prompt_len // 4
-        print(f"\n--- OpenAI Prompt Sent to LLM (for monetization ideas) ---\n(Prompt size: {prompt_len} chars, ~{approx_tokens} tokens)\n" + prompt + "\n--- End Prompt ---\n")
-        response = self._generate_chat_completion(prompt)
+
+        fields = {
+            "niche_description": niche_description,
+            "brand_voice": brand_voice,
+            "negative_keywords": ", ".join(negative_keywords) if negative_keywords else "",
+        }
+        # Precomputed when the taste profile was analyzed; rebuilt only if missing or outdated
+        summary = resolve_taste_summary(taste_profile, taste_summary)
+        return self.prompt_builder.build(
+            self.SYSTEM_MESSAGE, render, fields, summary, "monetization_block", format_monetization_profile
+        )
+
+    async def generate_monetization_ideas(
+        self,
+        niche_description: str,
+        taste_profile: Dict[str, Any],
+        collaboration_type: str,
+        brand_voice: str = "not specified",
+        negative_keywords: Optional[List[str]] = None,
+        taste_summary: Optional[Dict[str, Any]] = None,
+        bypass_cache: bool = False
+    ) -> List[Dict[str, Any]]:
+        prompt, report = self.build_monetization_prompt(
+            niche_description, taste_profile, collaboration_type, brand_voice,
+            negative_keywords, taste_summary
+        )
+        print(f"\n--- OpenAI Prompt Sent to LLM (for monetization ideas) ---\n(Prompt size: {len(prompt)} chars, {report['input_tokens']} tokens, trimmed: {report})\n" + prompt + "\n--- End Prompt ---\n")
+        response = await self._generate_chat_completion(
+            prompt, bypass_cache=bypass_cache, usage_kind="monetization_ideas", estimated_tokens=report["input_tokens"]
+        )
+        return self.parse_monetization_ideas(response)
+
+    def parse_monetization_ideas(self, response: Any) -> List[Dict[str, Any]]:
+        """Turn a parsed completion into at most 3 monetization ideas with every required key."""
         # Defensive: always return a list of ideas, and always fix required fields
         ideas = []
         if isinstance(response, dict) and "ideas" in response:
@@ -0,0 +1,195 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# tiktoken is optional, and loading an encoding may need a one-time download.
+# Without it, counts fall back to the ~4 chars/token rule of thumb.
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Fixed chat-format overhead per message and per reply (OpenAI cookbook numbers)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+TRUNCATION_MARKER = "..."
+
+class TokenCounter:
+    """Counts tokens with the model's tokenizer, or estimates them if it is unavailable."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        return self._get_encoding() is not None
+
+    def load(self) -> bool:
+        """Load the encoding up front (it may be downloaded); returns whether counts are exact."""
+        return self.exact
+
+    def _get_encoding(self):
+        if self._loaded:
+            return self._encoding
+        with self._lock:
+            if not self._loaded:
+                if tiktoken is not None:
+                    try:
+                        try:
+                            self._encoding = tiktoken.encoding_for_model(self.model)
+                        except KeyError:
+                            self._encoding = tiktoken.get_encoding("o200k_base")
+                    except Exception as e:
+                        print(f"  WARNING: tiktoken encoding unavailable ({e}); estimating prompt tokens")
+                else:
+                    print("  WARNING: tiktoken not installed; estimating prompt tokens")
+                self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text))
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        return sum(TOKENS_PER_MESSAGE + self.count(m["content"]) for m in messages) + TOKENS_PER_REPLY
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens, marking the cut."""
+        if not text or self.count(text) <= max_tokens:
+            return text
+        keep = max(0, max_tokens - self.count(TRUNCATION_MARKER))
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:keep * 4].rstrip() + TRUNCATION_MARKER
+        return encoding.decode(encoding.encode(text)[:keep]).rstrip() + TRUNCATION_MARKER
+
+def _entities_by_popularity(summary: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """(domain, index) for every summarized entity, least popular first."""
+    ranked = []
+    for domain, data in summary.items():
+        for index, entity in enumerate(data.get("entities", [])):
+            pop = entity.get("popularity")
+            ranked.append((pop if isinstance(pop, (int, float)) else -1.0, domain, index))
+    ranked.sort(key=lambda item: item[0])
+    return [(domain, index) for _, domain, index in ranked]
+
+def _without(summary: Dict[str, Any], dropped: set) -> Dict[str, Any]:
+    trimmed = {}
+    for domain, data in summary.items():
+        entities = [e for i, e in enumerate(data.get("entities", [])) if (domain, i) not in dropped]
+        if entities:
+            trimmed[domain] = {"entities": entities}
+    return trimmed
+
+class PromptBuilder:
+    """
+    Assembles prompts within an input token budget.
+
+    Free-text fields are capped at max_field_tokens each. If the prompt is
+    still over budget, taste-profile entities are dropped least popular
+    first and the profile block is re-rendered until it fits.
+    """
+
+    def __init__(self, model: str, max_input_tokens: int, max_field_tokens: int):
+        self.counter = TokenCounter(model)
+        self.max_input_tokens = max_input_tokens
+        self.max_field_tokens = max_field_tokens
+
+    def build(
+        self,
+        system_message: str,
+        render: Callable[[Dict[str, str], str], str],
+        fields: Dict[str, str],
+        taste_summary: Dict[str, Any],
+        block_key: str,
+        format_profile: Callable[[Dict[str, Any]], str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render a prompt via render(fields, profile_text). Returns the prompt
+        and a report with its token count and what was trimmed.
+        """
+        truncated_fields = []
+        capped = {}
+        for name, value in fields.items():
+            value = value or ""
+            capped[name] = self.counter.truncate(value, self.max_field_tokens)
+            if capped[name] != value:
+                truncated_fields.append(name)
+
+        def measure(prompt: str) -> int:
+            return self.counter.count_messages([
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ])
+
+        # The stored block is already rendered; only re-render when trimming
+        prompt = render(capped, taste_summary.get(block_key, ""))
+        tokens = measure(prompt)
+        summary = taste_summary.get("summary") or {}
+        ranked = _entities_by_popularity(summary)
+        dropped: set = set()
+        while tokens > self.max_input_tokens and len(dropped) < len(ranked):
+            dropped.add(ranked[len(dropped)])
+            prompt = render(capped, format_profile(_without(summary, dropped)))
+            tokens = measure(prompt)
+
+        if tokens > self.max_input_tokens:
+            print(f"  WARNING: Prompt is {tokens} tokens after trimming, over the {self.max_input_tokens} token budget")
+        return prompt, {
+            "input_tokens": tokens,
+            "exact": self.counter.exact,
+            "truncated_fields": truncated_fields,
+            "dropped_entities": len(dropped),
+        }
+
+class TokenUsageTracker:
+    """Running totals of prompt/completion tokens and latency per request kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        kind: str,
+        estimated_prompt_tokens: int,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        latency_ms: float
+    ) -> None:
+        with self._lock:
+            stats = self._kinds.setdefault(kind, {
+                "requests": 0,
+                "estimated_prompt_tokens": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "max_prompt_tokens": 0,
+                "max_completion_tokens": 0,
+                "latency_ms_total": 0.0,
+            })
+            stats["requests"] += 1
+            stats["estimated_prompt_tokens"] += estimated_prompt_tokens
+            stats["prompt_tokens"] += prompt_tokens or 0
+            stats["completion_tokens"] += completion_tokens or 0
+            stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens or 0)
+            stats["max_completion_tokens"] = max(stats["max_completion_tokens"], completion_tokens or 0)
+            stats["latency_ms_total"] += latency_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for kind, stats in self._kinds.items():
+                requests = stats["requests"]
+                result[kind] = {
+                    **{k: v for k, v in stats.items() if k != "latency_ms_total"},
+                    "avg_prompt_tokens": round(stats["prompt_tokens"] / requests, 1),
+                    "avg_completion_tokens": round(stats["completion_tokens"] / requests, 1),
+                    "avg_latency_ms": round(stats["latency_ms_total"] / requests, 1),
+                }
+            return result
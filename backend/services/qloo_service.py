@@ -1,8 +1,33 @@
-import requests
-from typing import Dict, List, Any
+import asyncio
+import random
+import time
+import httpx
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from config import settings
+from services.entity_cache import EntityResolutionCache
+from services.insights_cache import InsightsCache, make_insights_cache_key, STALE, MISS
+from services.rate_limiter import TokenBucket
+
+# Optional progress hook: called with an event name and its details
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
 
 class QlooService:
+    # Insights domains and the Qloo entity type each one is filtered to
+    DOMAIN_TO_FILTER_TYPE = {
+        "music": "urn:entity:artist",
+        "film": "urn:entity:movie",
+        "tv": "urn:entity:tv_show",
+        "podcasts": "urn:entity:podcast",
+        "books": "urn:entity:book",
+        "fashion_brands": "urn:entity:brand",
+        "video_games": "urn:entity:video_game"
+    }
+    # Number of entities requested per insights domain
+    INSIGHTS_TAKE = 5
+    # Responses worth retrying with backoff
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
     def __init__(self):
         self.api_key = settings.qloo_api_key
         # Define separate base URLs for the different API versions
@@ -11,98 +36,373 @@ class QlooService:
         self.headers = {
             "x-api-key": self.api_key
         }
+        self.max_concurrency = settings.qloo_max_concurrency
+        self.domain_timeout = settings.qloo_domain_timeout_seconds
+        self.search_concurrency = settings.qloo_search_concurrency
+        self.connect_timeout = settings.qloo_connect_timeout_seconds
+        self.max_retries = settings.qloo_max_retries
+        self.domain_refresh_seconds = settings.qloo_domain_refresh_seconds
+        # Shared by user-triggered analyses and the background profile refresh
+        self.rate_limiter = TokenBucket(settings.qloo_rate_limit_per_second, settings.qloo_rate_limit_burst)
+        self.client = self._build_client()
+        self.entity_cache = EntityResolutionCache()
+        self.insights_cache = InsightsCache()
+        # Background refreshes for stale insights cache entries, keyed by cache key
+        self._revalidations: Dict[str, asyncio.Task] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """
+        Long-lived pooled client shared by every request handler, so Qloo calls
+        reuse keep-alive connections instead of paying a TCP+TLS handshake each.
+        """
+        http2 = settings.qloo_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("WARNING: QLOO_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1.")
+                http2 = False
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(settings.qloo_read_timeout_seconds, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.qloo_pool_max_connections,
+                max_keepalive_connections=settings.qloo_pool_max_keepalive,
+                keepalive_expiry=settings.qloo_keepalive_expiry_seconds,
+            ),
+            http2=http2,
+        )
+
+    async def aclose(self) -> None:
+        """Release pooled connections and background refreshes (called on app shutdown)."""
+        for task in list(self._revalidations.values()):
+            task.cancel()
+        await self.client.aclose()
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After when given."""
+        cap = settings.qloo_retry_max_delay_seconds
+        if retry_after:
+            try:
+                return min(cap, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(cap, settings.qloo_retry_base_delay_seconds * (2 ** attempt)))
+
+    async def _get(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        timeout: Optional[httpx.Timeout] = None,
+        token_held: bool = False
+    ) -> httpx.Response:
+        """
+        GET through the pooled client, retrying 429/5xx and connection
+        failures. Every attempt takes a token from the rate limiter, except
+        the first when the caller already took one (token_held).
+        """
+        attempt = 0
+        while True:
+            retry_after = None
+            if attempt > 0 or not token_held:
+                await self.rate_limiter.acquire()
+            try:
+                if timeout is None:
+                    response = await self.client.get(url, params=params)
+                else:
+                    response = await self.client.get(url, params=params, timeout=timeout)
+            except httpx.ConnectError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            delay = self._backoff_delay(attempt, retry_after)
+            attempt += 1
+            print(f"  Retrying Qloo request to {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _normalize_keyword(keyword: str) -> str:
+        """Collapse whitespace and case so spelling variants share one lookup."""
+        return " ".join(str(keyword).split()).casefold()
 
-    def _search_for_entity_ids(self, keywords: List[str]) -> List[str]:
+    async def _search_for_entity_ids(self, keywords: List[str]) -> List[str]:
         """
         Use the Qloo Search API (v1 endpoint) to convert keywords into entity IDs.
+        Keywords are normalized and deduplicated, served from the entity cache
+        where possible, and the rest are resolved concurrently (bounded by
+        `qloo_search_concurrency`). IDs are returned in keyword order.
         """
+        # normalized keyword -> spelling sent to Qloo (first one seen)
+        unique_keywords: Dict[str, str] = {}
+        for keyword in keywords or []:
+            normalized = self._normalize_keyword(keyword)
+            if normalized and normalized not in unique_keywords:
+                unique_keywords[normalized] = " ".join(str(keyword).split())
+
+        if not unique_keywords:
+            return []
+
+        # The entity cache is backed by the sync engine, so keep it off the event loop
+        resolved = await asyncio.to_thread(self.entity_cache.get_many, list(unique_keywords))
+        to_search = [normalized for normalized in unique_keywords if normalized not in resolved]
+        print(f"Resolved {len(resolved)}/{len(unique_keywords)} keywords from the entity cache")
+
+        if to_search:
+            print(f"Searching for entity IDs for keywords: {[unique_keywords[k] for k in to_search]}")
+            semaphore = asyncio.Semaphore(max(1, self.search_concurrency))
+
+            async def bounded_search(keyword: str) -> Tuple[Optional[str], bool]:
+                async with semaphore:
+                    return await self._search_entity_id(keyword)
+
+            # gather returns results in input order
+            lookups = await asyncio.gather(*(bounded_search(unique_keywords[k]) for k in to_search))
+            fresh = {}
+            for normalized, (entity_id, cacheable) in zip(to_search, lookups):
+                resolved[normalized] = entity_id
+                # Only definitive answers are cached; request errors are retried next time
+                if cacheable:
+                    fresh[normalized] = entity_id
+            await asyncio.to_thread(self.entity_cache.set_many, fresh)
+
         entity_ids = []
+        for normalized in unique_keywords:
+            entity_id = resolved.get(normalized)
+            if entity_id and entity_id not in entity_ids:
+                entity_ids.append(entity_id)
+        return entity_ids
+
+    async def _search_entity_id(self, keyword: str) -> Tuple[Optional[str], bool]:
+        """
+        Resolve a single keyword to its top Qloo entity ID. Returns
+        (entity_id or None, whether the answer is definitive and cacheable).
+        """
         # Use the correct v1 endpoint for search
         endpoint = f"{self.base_url_v1}/search"
-        
-        print(f"Searching for entity IDs for keywords: {keywords}")
-        for keyword in keywords:
-            try:
-                # Corrected 'take' parameter to be greater than 1
-                params = {"query": keyword, "take": 2}
-                response = requests.get(endpoint, headers=self.headers, params=params)
-                response.raise_for_status()
-                results = response.json().get("results", []) # The key is 'results', not 'data'
-                if results and results[0].get("entity_id"):
-                    entity_id = results[0]["entity_id"]
-                    print(f"  SUCCESS: Found entity for '{keyword}': {entity_id}")
-                    entity_ids.append(entity_id)
-                else:
-                    print(f"  WARNING: No entity found for keyword '{keyword}'.")
-            except requests.exceptions.RequestException as e:
-                print(f"  ERROR: Could not find entity for keyword '{keyword}': {e}")
-        
-        return list(set(entity_ids))
+        try:
+            # Corrected 'take' parameter to be greater than 1
+            params = {"query": keyword, "take": 2}
+            response = await self._get(endpoint, params=params)
+            response.raise_for_status()
+            results = response.json().get("results", []) # The key is 'results', not 'data'
+            if results and results[0].get("entity_id"):
+                entity_id = results[0]["entity_id"]
+                print(f"  SUCCESS: Found entity for '{keyword}': {entity_id}")
+                return entity_id, True
+            print(f"  WARNING: No entity found for keyword '{keyword}'.")
+            return None, True
+        except httpx.HTTPError as e:
+            print(f"  ERROR: Could not find entity for keyword '{keyword}': {e}")
+        return None, False
 
-    def analyze_audience_taste(self, audience_data: str, keywords: List[str]) -> Dict[str, Any]:
+    async def analyze_audience_taste(
+        self,
+        audience_data: str,
+        keywords: List[str],
+        on_progress: Optional[ProgressCallback] = None,
+        previous: Optional[Dict[str, Any]] = None,
+        max_domain_age_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Analyze audience taste using a two-step process:
         1. Search for entity IDs (v1).
         2. Get insights for those IDs (v2).
+        on_progress receives "entities_resolved" and one "domain_complete" event per domain.
+
+        With previous (the stored result of the last analysis) the run is
+        incremental: domains whose stored insights are error-free and younger
+        than max_domain_age_seconds (default qloo_domain_refresh_seconds)
+        are kept as they are, and only the rest are re-fetched. Every
+        domain's insights are computed from the whole entity set, so this
+        only applies while the keywords still resolve to the same entities;
+        otherwise all domains are re-fetched.
         """
         if not self.api_key or self.api_key == "YOUR_QLOO_API_KEY":
             return self._get_mock_taste_profile(audience_data, keywords)
 
-        entity_ids = self._search_for_entity_ids(keywords)
+        entity_ids = await self._search_for_entity_ids(keywords)
+        if on_progress:
+            on_progress("entities_resolved", {"entity_ids": entity_ids})
 
         if not entity_ids:
             return {
                 "taste_profile": {},
+                "entity_ids": [],
                 "analysis_notes": "Could not find any matching entities for the provided keywords in Qloo."
             }
 
-        domain_to_filter_type = {
-            "music": "urn:entity:artist",
-            "film": "urn:entity:movie",
-            "tv": "urn:entity:tv_show",
-            "podcasts": "urn:entity:podcast",
-            "books": "urn:entity:book",
-            "fashion_brands": "urn:entity:brand",
-            "video_games": "urn:entity:video_game"
-        }
+        reused = self._reusable_domains(previous, entity_ids, max_domain_age_seconds)
+        if on_progress:
+            for domain in reused:
+                on_progress("domain_complete", {"domain": domain, "ok": True, "elapsed_ms": 0.0, "reused": True})
+        to_fetch = [domain for domain in self.DOMAIN_TO_FILTER_TYPE if domain not in reused]
+        print(f"Getting insights for entity IDs: {entity_ids} ({len(to_fetch)} domains, {len(reused)} reused)")
+        fetched, domain_timings = await self._fetch_all_domain_insights(entity_ids, on_progress, to_fetch)
 
+        fetched_at = datetime.utcnow().isoformat()
         taste_profile_results = {}
-        
-        print(f"Getting insights for entity IDs: {entity_ids}")
-        for domain, filter_type in domain_to_filter_type.items():
-            try:
-                # Use the correct v2 endpoint for insights
-                endpoint = f"{self.base_url_v2}/insights"
-                
-                params = {
-                    "signal.interests.entities": ",".join(entity_ids),
-                    "filter.type": filter_type,
-                    "take": 5
-                }
-
-                response = requests.get(endpoint, headers=self.headers, params=params)
-
-                if response.status_code == 403:
-                    print(f"Qloo API access forbidden for domain '{domain}'. Skipping.")
-                    taste_profile_results[domain] = {"error": "Access to this domain is restricted."}
-                    continue
-                
-                response.raise_for_status()
-                
-                taste_profile_results[domain] = response.json().get("results", {})
-
-            except requests.exceptions.RequestException as e:
-                print(f"Qloo API request for domain '{domain}' failed: {e}")
-                if e.response is not None:
-                    print(f"Qloo API response status: {e.response.status_code}")
-                    print(f"Qloo API response body: {e.response.text}")
-                taste_profile_results[domain] = {"error": f"Failed to fetch data: {e.response.text if e.response else 'N/A'}"}
+        domain_fetched_at = {}
+        for domain in self.DOMAIN_TO_FILTER_TYPE:
+            if domain in reused:
+                taste_profile_results[domain], domain_fetched_at[domain] = reused[domain]
+                continue
+            taste_profile_results[domain] = fetched[domain]
+            # Failed domains get no timestamp so the next incremental run retries them
+            if not (isinstance(fetched[domain], dict) and fetched[domain].get("error")):
+                domain_fetched_at[domain] = fetched_at
 
         return {
             "taste_profile": taste_profile_results,
+            "entity_ids": entity_ids,
+            "domain_fetched_at": domain_fetched_at,
+            "reused_domains": list(reused),
+            "domain_timings_ms": domain_timings,
             "analysis_notes": "Live cross-domain insights analysis using Qloo v2/insights API"
         }
 
+    def _reusable_domains(
+        self,
+        previous: Optional[Dict[str, Any]],
+        entity_ids: List[str],
+        max_age_seconds: Optional[int] = None
+    ) -> Dict[str, Tuple[Any, str]]:
+        """Domains of a previous analysis that are still fresh for this entity set: {domain: (result, fetched_at)}."""
+        if not isinstance(previous, dict) or sorted(previous.get("entity_ids") or []) != sorted(entity_ids):
+            return {}
+        stored = previous.get("taste_profile") or {}
+        if max_age_seconds is None:
+            max_age_seconds = self.domain_refresh_seconds
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+        reusable = {}
+        for domain, fetched_at in (previous.get("domain_fetched_at") or {}).items():
+            result = stored.get(domain)
+            if domain not in self.DOMAIN_TO_FILTER_TYPE or result is None:
+                continue
+            if isinstance(result, dict) and result.get("error"):
+                continue
+            try:
+                if datetime.fromisoformat(fetched_at) < cutoff:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            reusable[domain] = (result, fetched_at)
+        return reusable
+
+    async def _fetch_all_domain_insights(
+        self,
+        entity_ids: List[str],
+        on_progress: Optional[ProgressCallback] = None,
+        domains: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Fan out one v2/insights request per domain (all of them unless
+        domains is given) concurrently, bounded by `qloo_max_concurrency`.
+        Returns the per-domain results and timings (ms).
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def bounded_fetch(domain: str, filter_type: str) -> Tuple[Any, float]:
+            async with semaphore:
+                result, elapsed_ms = await self._fetch_domain_insights(domain, filter_type, entity_ids)
+            print(f"  Domain '{domain}' finished in {elapsed_ms:.0f} ms")
+            if on_progress:
+                ok = not (isinstance(result, dict) and result.get("error"))
+                on_progress("domain_complete", {"domain": domain, "ok": ok, "elapsed_ms": elapsed_ms})
+            return result, elapsed_ms
+
+        domains = [(domain, filter_type) for domain, filter_type in self.DOMAIN_TO_FILTER_TYPE.items() if domains is None or domain in domains]
+        fetched = await asyncio.gather(*(bounded_fetch(domain, filter_type) for domain, filter_type in domains))
+
+        # gather keeps the canonical domain order regardless of completion order
+        taste_profile_results = {domain: result for (domain, _), (result, _) in zip(domains, fetched)}
+        domain_timings = {domain: elapsed_ms for (domain, _), (_, elapsed_ms) in zip(domains, fetched)}
+        return taste_profile_results, domain_timings
+
+    async def _fetch_domain_insights(self, domain: str, filter_type: str, entity_ids: List[str]) -> Tuple[Any, float]:
+        """
+        Fetch insights for a single domain, going through the insights cache.
+        Stale cache entries are returned immediately and revalidated in the
+        background. Never raises.
+        """
+        started = time.perf_counter()
+        cache_key = make_insights_cache_key(entity_ids, filter_type, self.INSIGHTS_TAKE)
+        result, cache_status = await self.insights_cache.alookup(cache_key)
+
+        if cache_status == STALE:
+            self._schedule_revalidation(cache_key, domain, filter_type, entity_ids)
+        elif cache_status == MISS:
+            result, ok = await self._request_domain_insights(domain, filter_type, entity_ids)
+            if ok:
+                await self.insights_cache.astore(cache_key, result)
+
+        return result, round((time.perf_counter() - started) * 1000, 1)
+
+    def _schedule_revalidation(self, cache_key: str, domain: str, filter_type: str, entity_ids: List[str]) -> None:
+        if cache_key in self._revalidations:
+            return
+
+        async def revalidate():
+            try:
+                result, ok = await self._request_domain_insights(domain, filter_type, entity_ids)
+                if ok:
+                    await self.insights_cache.astore(cache_key, result)
+            finally:
+                self._revalidations.pop(cache_key, None)
+
+        self._revalidations[cache_key] = asyncio.create_task(revalidate())
+
+    async def _request_domain_insights(self, domain: str, filter_type: str, entity_ids: List[str]) -> Tuple[Any, bool]:
+        """
+        Call v2/insights for a single domain within its own timeout. Returns
+        (result, ok); failures come back in the per-domain {"error": ...}
+        shape with ok=False so one domain can't sink the others and errors
+        are never cached.
+        """
+        try:
+            # Use the correct v2 endpoint for insights
+            endpoint = f"{self.base_url_v2}/insights"
+
+            params = {
+                "signal.interests.entities": ",".join(entity_ids),
+                "filter.type": filter_type,
+                "take": self.INSIGHTS_TAKE
+            }
+
+            # Queueing for the shared rate limit isn't Qloo being slow, so the
+            # first token is taken before the domain's timeout starts
+            await self.rate_limiter.acquire()
+            # wait_for bounds the whole domain, retries included
+            response = await asyncio.wait_for(
+                self._get(
+                    endpoint,
+                    params=params,
+                    timeout=httpx.Timeout(self.domain_timeout, connect=self.connect_timeout),
+                    token_held=True
+                ),
+                timeout=self.domain_timeout,
+            )
+
+            if response.status_code == 403:
+                print(f"Qloo API access forbidden for domain '{domain}'. Skipping.")
+                return {"error": "Access to this domain is restricted."}, False
+
+            response.raise_for_status()
+            return response.json().get("results", {}), True
+
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            print(f"Qloo API request for domain '{domain}' timed out after {self.domain_timeout}s")
+            return {"error": f"Timed out after {self.domain_timeout}s"}, False
+        except httpx.HTTPError as e:
+            print(f"Qloo API request for domain '{domain}' failed: {e}")
+            error_response = getattr(e, "response", None)
+            if error_response is not None:
+                print(f"Qloo API response status: {error_response.status_code}")
+                print(f"Qloo API response body: {error_response.text}")
+            return {"error": f"Failed to fetch data: {error_response.text if error_response is not None else 'N/A'}"}, False
+
     # --- Mock data methods for fallback and development ---
     def _get_mock_taste_profile(self, audience_data: str, keywords: List[str]) -> Dict[str, Any]:
         """
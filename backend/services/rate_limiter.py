@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+class TokenBucket:
+    """
+    Async token bucket: refills at rate tokens per second up to capacity.
+    A rate of 0 or less disables limiting. Used as the process-wide budget
+    for outbound Qloo requests.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        if not self.enabled:
+            return self.capacity
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available and take them. Waiters are served in arrival order."""
+        if not self.enabled:
+            return
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                self.waits += 1
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+            self.acquired += 1
+
+    async def wait_for_headroom(self, tokens: float) -> None:
+        """Wait, without taking anything, until at least tokens are available."""
+        if not self.enabled:
+            return
+        tokens = min(tokens, self.capacity)
+        while self.available() < tokens:
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "available": round(self.available(), 2),
+            "acquired": self.acquired,
+            "waits": self.waits,
+        }
@@ -0,0 +1,112 @@
+from typing import Any, Dict, Optional
+
+# Bump whenever the summary shape or either rendered block changes, so stored summaries get rebuilt
+TASTE_SUMMARY_VERSION = 1
+
+def summarize_taste_profile(tp: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Summarize and trim the taste_profile for the LLM (top 3 entities per
+    domain, skip errors, remove analysis_notes).
+    """
+    # Bulletproof: Only include allowed fields, never reference or mutate original dicts
+    if not tp:
+        return {}
+    taste = tp.get("taste_profile", tp)
+    summary = {}
+    if isinstance(taste, dict):
+        for domain, data in taste.items():
+            if not isinstance(data, dict):
+                continue
+            if data.get("error"):
+                continue
+            entities = data.get("entities") or data.get("results")
+            if isinstance(entities, list):
+                trimmed_entities = []
+                for e in entities[:3]:
+                    if not isinstance(e, dict) or not e.get("name"):
+                        continue
+                    # Only allowed fields: name, short_description, tags, popularity
+                    trimmed = {}
+                    trimmed["name"] = e.get("name")
+                    # Short description: prefer first value in short_descriptions, else fallback to short_description
+                    sd = None
+                    props = e.get("properties", {})
+                    sds = props.get("short_descriptions")
+                    if isinstance(sds, list) and sds and isinstance(sds[0], dict):
+                        sd = sds[0].get("value")
+                    elif isinstance(props.get("short_description"), str):
+                        sd = props.get("short_description")
+                    trimmed["short_description"] = sd
+                    # Tags: up to 3 tag names
+                    tags = e.get("tags")
+                    if isinstance(tags, list):
+                        trimmed["tags"] = [t.get("name") for t in tags[:3] if isinstance(t, dict) and t.get("name")]
+                    else:
+                        trimmed["tags"] = None
+                    trimmed["popularity"] = e.get("popularity")
+                    trimmed_entities.append(trimmed)
+                summary[domain] = {"entities": trimmed_entities}
+    return summary
+
+def format_content_profile(profile: Dict[str, Any]) -> str:
+    """Render a trimmed profile as the block used in content-idea prompts."""
+    lines = []
+    for domain, data in profile.items():
+        # Section header for domain
+        lines.append(f"\n=== {domain.title()} ===")
+        for entity in data.get("entities", []):
+            name = entity.get("name", "")
+            desc = entity.get("short_description") or ""
+            tags = entity.get("tags") or []
+            pop = entity.get("popularity")
+            # Modal-style: each field on its own line, clear labels
+            lines.append(f"• Name: {name}")
+            if desc:
+                lines.append(f"  Description: {desc}")
+            if tags:
+                lines.append(f"  Tags: {', '.join(tags)}")
+            if isinstance(pop, (int, float)):
+                lines.append(f"  Popularity: {round(pop*100,1)}%")
+            lines.append("")
+    return '\n'.join(lines)
+
+def format_monetization_profile(profile: Dict[str, Any]) -> str:
+    """Render a trimmed profile as the block used in monetization prompts."""
+    lines = []
+    for domain, data in profile.items():
+        lines.append(f"{domain.title()}")
+        for entity in data.get("entities", []):
+            name = entity.get("name", "")
+            desc = entity.get("short_description") or ""
+            tags = entity.get("tags") or []
+            tags_str = f" [Tags: {', '.join(tags)}]" if tags else ""
+            pop = entity.get("popularity")
+            pop_str = f" (Popularity: {round(pop*100,1)}%)" if isinstance(pop, (int, float)) else ""
+            lines.append(f"- {name}: {desc}{tags_str}{pop_str}")
+        lines.append("")
+    return '\n'.join(lines)
+
+def build_taste_summary(taste_profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Precompute the trimmed summary and both rendered prompt blocks. Stored on
+    CreatorProfile.taste_summary when the taste profile is written.
+    """
+    summary = summarize_taste_profile(taste_profile)
+    return {
+        "version": TASTE_SUMMARY_VERSION,
+        "summary": summary,
+        "content_block": format_content_profile(summary),
+        "monetization_block": format_monetization_profile(summary),
+    }
+
+def is_current_taste_summary(taste_summary: Optional[Dict[str, Any]]) -> bool:
+    return isinstance(taste_summary, dict) and taste_summary.get("version") == TASTE_SUMMARY_VERSION
+
+def resolve_taste_summary(
+    taste_profile: Optional[Dict[str, Any]],
+    taste_summary: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Reuse a stored summary when its version is current, otherwise build one from the raw profile."""
+    if is_current_taste_summary(taste_summary):
+        return taste_summary
+    return build_taste_summary(taste_profile)
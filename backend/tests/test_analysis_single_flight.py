@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from analysis import AnalysisSingleFlight, make_analysis_key
+from database import AsyncSessionLocal, User, CreatorProfile
+from jobs import AnalysisJob, DOMAIN_DONE, DOMAIN_ERROR, DOMAIN_SKIPPED
+from services.qloo_service import QlooService
+
+DOMAINS = list(QlooService.DOMAIN_TO_FILTER_TYPE)
+
+class FakeQloo:
+    """Stands in for QlooService: counts runs and holds each one until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def analyze_audience_taste(self, audience_data, keywords, on_progress=None, previous=None, max_domain_age_seconds=None):
+        self.calls.append({"previous": previous, "max_domain_age_seconds": max_domain_age_seconds})
+        if on_progress:
+            on_progress("entities_resolved", {"entity_ids": ["e1"]})
+        await self.release.wait()
+        for domain in DOMAINS:
+            if on_progress:
+                on_progress("domain_complete", {"domain": domain, "ok": True, "elapsed_ms": 1.0})
+        return {"taste_profile": {domain: {"entities": []} for domain in DOMAINS}, "run": len(self.calls)}
+
+async def create_profile() -> CreatorProfile:
+    name = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"{name}@example.com", username=name, hashed_password="x")
+        db.add(user)
+        await db.flush()
+        profile = CreatorProfile(
+            user_id=user.id, profile_name=name, niche_description="n",
+            keywords=["jazz"], social_platform="youtube", social_handle=name, audience_data=""
+        )
+        db.add(profile)
+        await db.commit()
+        return profile
+
+async def started(single_flight: AnalysisSingleFlight, expected: int) -> None:
+    """Let the spawned runs reach the fake Qloo call."""
+    while sum(1 for shared in single_flight._inflight.values() if shared.events) < expected:
+        await asyncio.sleep(0)
+
+async def stored_analysis(profile_id: int):
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(CreatorProfile.taste_profile, CreatorProfile.analyzed_at).where(CreatorProfile.id == profile_id)
+        )).first()
+
+async def concurrent_calls_share_one_run():
+    single_flight, qloo, profile = AnalysisSingleFlight(), FakeQloo(), await create_profile()
+    calls = [asyncio.ensure_future(single_flight.analyze(qloo, profile)) for _ in range(5)]
+    await started(single_flight, 1)
+    qloo.release.set()
+    results = await asyncio.gather(*calls)
+    return single_flight, qloo, results, await stored_analysis(profile.id)
+
+def test_concurrent_calls_share_one_run():
+    single_flight, qloo, results, stored = asyncio.run(concurrent_calls_share_one_run())
+    assert len(qloo.calls) == 1 and single_flight.runs == 1 and single_flight.coalesced == 4
+    assert all(result is results[0] for result in results)
+    assert stored.taste_profile == results[0] and stored.analyzed_at is not None
+    assert single_flight.stats()["in_flight"] == 0
+
+async def different_options_run_separately():
+    single_flight, qloo, profile = AnalysisSingleFlight(), FakeQloo(), await create_profile()
+    calls = [
+        asyncio.ensure_future(single_flight.analyze(qloo, profile)),
+        asyncio.ensure_future(single_flight.analyze(qloo, profile, incremental=True)),
+        asyncio.ensure_future(single_flight.analyze(qloo, profile, incremental=True, max_domain_age_seconds=60)),
+    ]
+    await started(single_flight, 3)
+    qloo.release.set()
+    await asyncio.gather(*calls)
+    return single_flight, qloo
+
+def test_different_incremental_options_do_not_share_a_run():
+    single_flight, qloo = asyncio.run(different_options_run_separately())
+    assert len(qloo.calls) == 3 and single_flight.coalesced == 0
+    assert sorted(str(call["max_domain_age_seconds"]) for call in qloo.calls) == ["60", "None", "None"]
+
+async def older_run_does_not_overwrite_newer():
+    single_flight, qloo, profile = AnalysisSingleFlight(), FakeQloo(), await create_profile()
+    qloo.release.set()
+    key = make_analysis_key(profile.keywords)
+    now = datetime.utcnow()
+
+    async def store(started_at: datetime):
+        return await single_flight._analyze_and_store(
+            qloo, profile.id, key, profile.keywords, "", None, False, None, started_at, None
+        )
+
+    newer = await store(now)
+    await store(now - timedelta(minutes=5))
+    return single_flight, newer, now, await stored_analysis(profile.id)
+
+def test_older_run_does_not_overwrite_newer_analysis():
+    single_flight, newer, now, stored = asyncio.run(older_run_does_not_overwrite_newer())
+    assert single_flight.stale_writes_skipped == 1
+    assert stored.analyzed_at == now and stored.taste_profile == newer
+
+async def coalesced_jobs_get_progress():
+    single_flight, qloo, profile = AnalysisSingleFlight(), FakeQloo(), await create_profile()
+    first, joiner = AnalysisJob(profile.user_id, profile.id), AnalysisJob(profile.user_id, profile.id)
+    running = asyncio.ensure_future(single_flight.analyze(qloo, profile, first.on_progress))
+    await started(single_flight, 1)
+    # Joins after entities_resolved was sent; it is replayed
+    joined = asyncio.ensure_future(single_flight.analyze(qloo, profile, joiner.on_progress))
+    await asyncio.sleep(0)
+    qloo.release.set()
+    await asyncio.gather(running, joined)
+    return single_flight, first, joiner
+
+def test_coalesced_callers_all_get_progress():
+    single_flight, first, joiner = asyncio.run(coalesced_jobs_get_progress())
+    assert single_flight.runs == 1 and single_flight.coalesced == 1
+    for job in (first, joiner):
+        assert job.stage == "fetching_insights"
+        assert set(job.domains.values()) == {DOMAIN_DONE}
+
+def test_job_domains_are_settled_from_the_result():
+    job = AnalysisJob(1, 1)
+    job.result = {"taste_profile": {DOMAINS[0]: {"entities": []}, DOMAINS[1]: {"error": "Timed out"}}}
+    job.settle_domains()
+    assert job.domains[DOMAINS[0]] == DOMAIN_DONE
+    assert job.domains[DOMAINS[1]] == DOMAIN_ERROR
+    assert job.domains[DOMAINS[2]] == DOMAIN_SKIPPED
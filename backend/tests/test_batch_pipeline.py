@@ -0,0 +1,56 @@
+import asyncio
+from sqlalchemy import func, select
+from batch_pipeline import LocalBatchExecutor, prepare_batch, fetch_batch, ingest_batch_output
+from database import AsyncSessionLocal, User, CreatorProfile, ContentIdea, MonetizationIdea
+from services.openai_service import OpenAIService
+
+TASTE_PROFILE = {"taste_profile": {"music": {"entities": [{"name": "Khruangbin", "popularity": 0.8}]}}}
+
+async def create_analyzed_profile() -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(email="batch@example.com", username="batch", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        profile = CreatorProfile(
+            user_id=user.id, profile_name="Batch", niche_description="slow living",
+            keywords=["jazz"], social_platform="youtube", social_handle="batch",
+            audience_data="", taste_profile=TASTE_PROFILE
+        )
+        db.add(profile)
+        await db.commit()
+        return user.id
+
+async def count_ideas(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        content = await db.scalar(select(func.count()).select_from(ContentIdea).where(ContentIdea.user_id == user_id))
+        monetization = await db.scalar(select(func.count()).select_from(MonetizationIdea).where(MonetizationIdea.user_id == user_id))
+        return content + monetization
+
+async def run_pipeline(tmp_path):
+    user_id = await create_analyzed_profile()
+    openai_service = OpenAIService()
+    executor = LocalBatchExecutor(str(tmp_path / "batches"))
+    requests_path = str(tmp_path / "requests.jsonl")
+    output_path = str(tmp_path / "output.jsonl")
+    try:
+        async with AsyncSessionLocal() as db:
+            written = await prepare_batch(db, openai_service, requests_path, user_id=user_id)
+        assert written == 2
+
+        batch_id = await executor.submit(requests_path)
+        assert await fetch_batch(executor, batch_id, output_path, poll_seconds=0) == "completed"
+
+        async with AsyncSessionLocal() as db:
+            first = await ingest_batch_output(db, openai_service, output_path)
+        async with AsyncSessionLocal() as db:
+            second = await ingest_batch_output(db, openai_service, output_path)
+    finally:
+        await openai_service.aclose()
+
+    expected = OpenAIService.CONTENT_IDEAS_PER_REQUEST + 3
+    assert first["inserted"] == expected and first["failed_requests"] == 0
+    assert second["inserted"] == 0 and second["already_ingested"] == expected
+    assert await count_ideas(user_id) == expected
+
+def test_local_pipeline_ingest_is_idempotent(tmp_path):
+    asyncio.run(run_pipeline(tmp_path))
@@ -0,0 +1,14 @@
+import pytest
+from fastapi import HTTPException
+from database import ContentIdea
+from main import bulk_idea_conditions
+from schemas import ContentIdeaBulkDelete
+
+def test_empty_filter_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        bulk_idea_conditions(ContentIdea, ContentIdeaBulkDelete(filter={}), user_id=1)
+    assert error.value.status_code == 400
+
+def test_filter_fields_become_conditions():
+    selection = ContentIdeaBulkDelete(filter={"saved": False, "content_type": "video"})
+    assert len(bulk_idea_conditions(ContentIdea, selection, user_id=1)) == 3
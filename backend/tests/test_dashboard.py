@@ -0,0 +1,29 @@
+import asyncio
+from dashboard import load_dashboard_summary
+from database import AsyncSessionLocal, User, CreatorProfile, ContentIdea
+from schemas import DashboardSummary
+
+async def summary_with_malformed_visual_elements():
+    async with AsyncSessionLocal() as db:
+        user = User(email="dashboard@example.com", username="dashboard", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        profile = CreatorProfile(
+            user_id=user.id, profile_name="Dash", niche_description="travel",
+            keywords=["trains"], social_platform="youtube", social_handle="dash", audience_data=""
+        )
+        db.add(profile)
+        await db.flush()
+        for title, visual_elements in (("null", None), ("string", "sunset"), ("list", ["map"])):
+            db.add(ContentIdea(
+                user_id=user.id, creator_profile_id=profile.id, title=title, concept="c",
+                content_type="video", visual_elements=visual_elements, call_to_action="cta"
+            ))
+        await db.commit()
+        return await load_dashboard_summary(db, user.id, 5)
+
+def test_recent_ideas_normalize_visual_elements():
+    summary = DashboardSummary.model_validate(asyncio.run(summary_with_malformed_visual_elements()))
+    visual_elements = {idea.title: idea.visual_elements for idea in summary.recent_content_ideas}
+    assert visual_elements == {"null": [], "string": [], "list": ["map"]}
+    assert summary.content_ideas.total == 3
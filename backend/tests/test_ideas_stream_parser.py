@@ -0,0 +1,65 @@
+import json
+import random
+from services.openai_service import IdeasStreamParser
+
+IDEAS = [
+    {
+        "title": "Night trains of \"Europe\"",
+        "concept": "A {braces} and [brackets] tour, path C:\\trains\\",
+        "visual_elements": ["sleeper cabin", "map with } and ]"],
+        "call_to_action": "Comment your route \u2192",
+        "why_it_works": "Slow travel is trending",
+    },
+    {"title": "Caf\u00e9 \\\"review\\\"", "concept": "", "visual_elements": [], "call_to_action": "Save it"},
+    {"title": "Third", "concept": "nested", "visual_elements": [{"shot": "wide"}], "call_to_action": "Follow"},
+]
+# As a model would stream it: pretty-printed, escapes left as \uXXXX
+COMPLETION = json.dumps({"ideas": IDEAS}, indent=2)
+
+def feed_chunks(chunks):
+    parser = IdeasStreamParser()
+    ideas = []
+    for chunk in chunks:
+        ideas.extend(parser.feed(chunk))
+    return ideas
+
+def test_every_two_way_split_yields_each_idea_once():
+    for split in range(len(COMPLETION) + 1):
+        assert feed_chunks([COMPLETION[:split], COMPLETION[split:]]) == IDEAS, split
+
+def test_random_chunk_boundaries():
+    rng = random.Random(1234)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(COMPLETION)), rng.randint(1, 40)))
+        chunks = [COMPLETION[start:end] for start, end in zip([0] + cuts, cuts + [len(COMPLETION)])]
+        assert feed_chunks(chunks) == IDEAS
+
+def test_one_character_at_a_time():
+    assert feed_chunks(list(COMPLETION)) == IDEAS
+
+def test_bare_top_level_array():
+    assert feed_chunks(list(json.dumps(IDEAS))) == IDEAS
+
+def test_ideas_are_yielded_as_soon_as_they_close():
+    parser = IdeasStreamParser()
+    first_end = COMPLETION.index("\n    }") + len("\n    }")
+    assert parser.feed(COMPLETION[:first_end - 1]) == []
+    assert parser.feed(COMPLETION[first_end - 1:first_end]) == [IDEAS[0]]
+    assert parser.feed(COMPLETION[first_end:]) == IDEAS[1:]
+
+def test_truncated_tail_keeps_complete_ideas():
+    truncated = COMPLETION[:COMPLETION.index('"Third"')]
+    assert feed_chunks(list(truncated)) == IDEAS[:2]
+
+def test_invalid_object_is_skipped():
+    completion = '{"ideas": [{"title": "ok"}, {"title": "bad",}, {"title": "after"}]}'
+    assert feed_chunks(list(completion)) == [{"title": "ok"}, {"title": "after"}]
+
+def test_stray_closing_brace_does_not_stop_later_ideas():
+    completion = '{"ideas": [{"title": "ok"}}, {"title": "after"}]}'
+    assert feed_chunks([completion[:20], completion[20:]]) == [{"title": "ok"}, {"title": "after"}]
+
+def test_input_after_the_array_is_ignored():
+    parser = IdeasStreamParser()
+    assert parser.feed('{"ideas": [{"title": "a"}]') == [{"title": "a"}]
+    assert parser.feed(', "extra": [{"title": "b"}]}') == []
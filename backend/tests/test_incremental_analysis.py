@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+from services.qloo_service import QlooService
+
+def previous_analysis(age: timedelta) -> dict:
+    fetched_at = (datetime.utcnow() - age).isoformat()
+    return {
+        "entity_ids": ["e1"],
+        "taste_profile": {domain: {"entities": []} for domain in QlooService.DOMAIN_TO_FILTER_TYPE},
+        "domain_fetched_at": {domain: fetched_at for domain in QlooService.DOMAIN_TO_FILTER_TYPE},
+    }
+
+def test_max_domain_age_overrides_refresh_window():
+    service = QlooService()
+    previous = previous_analysis(timedelta(days=2))
+    assert set(service._reusable_domains(previous, ["e1"])) == set(QlooService.DOMAIN_TO_FILTER_TYPE)
+    assert service._reusable_domains(previous, ["e1"], max_age_seconds=86400) == {}
+
+def test_changed_entities_refetch_everything():
+    assert QlooService()._reusable_domains(previous_analysis(timedelta(0)), ["e2"]) == {}
@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from database import SessionLocal, LLMResponseCacheEntry
+from services import lru_cache
+from services.llm_cache import LLMResponseCache
+
+def make_cache(persist: bool = False) -> LLMResponseCache:
+    cache = LLMResponseCache()
+    cache.enabled = True
+    cache.persist = persist
+    return cache
+
+class CountingModel:
+    """Stands in for the chat completion: counts calls and answers once released."""
+
+    def __init__(self, response=None, error: Exception = None):
+        self.calls = 0
+        self.response = response if response is not None else {"ideas": [{"title": "a"}]}
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+async def concurrent_identical_prompts():
+    cache, model = make_cache(), CountingModel()
+    calls = [asyncio.ensure_future(cache.get_or_compute("key", "gpt-4o", model)) for _ in range(5)]
+    await asyncio.sleep(0)
+    model.release.set()
+    responses = await asyncio.gather(*calls)
+    # A later identical prompt is served from the cache
+    responses.append(await cache.get_or_compute("key", "gpt-4o", model))
+    return cache, model, responses
+
+def test_concurrent_identical_prompts_call_the_model_once():
+    cache, model, responses = asyncio.run(concurrent_identical_prompts())
+    assert model.calls == 1
+    assert cache.coalesced == 4 and cache.hits == 1
+    assert all(response == model.response for response in responses)
+    # Every caller gets its own copy, so in-place sanitizing can't leak between them
+    assert len({id(response) for response in responses}) == len(responses)
+
+async def failing_prompt():
+    cache, model = make_cache(), CountingModel(error=RuntimeError("upstream down"))
+    calls = [asyncio.ensure_future(cache.get_or_compute("key", "gpt-4o", model)) for _ in range(3)]
+    await asyncio.sleep(0)
+    model.release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    model.error = None
+    retried = await cache.get_or_compute("key", "gpt-4o", model)
+    return model, results, retried
+
+def test_exceptions_reach_every_waiter_and_are_not_cached():
+    model, results, retried = asyncio.run(failing_prompt())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == model.response and model.calls == 2
+
+async def error_response_then_retry():
+    cache, model = make_cache(), CountingModel(response={"error": "rate limited"})
+    model.release.set()
+    first = await cache.get_or_compute("key", "gpt-4o", model)
+    model.response = {"ideas": []}
+    second = await cache.get_or_compute("key", "gpt-4o", model)
+    return model, first, second
+
+def test_error_responses_are_not_cached():
+    model, first, second = asyncio.run(error_response_then_retry())
+    assert first == {"error": "rate limited"} and second == {"ideas": []} and model.calls == 2
+
+async def bypassed_prompt():
+    cache, model = make_cache(), CountingModel()
+    model.release.set()
+    await cache.get_or_compute("key", "gpt-4o", model)
+    model.response = {"ideas": [{"title": "fresh"}]}
+    bypassed = await cache.get_or_compute("key", "gpt-4o", model, bypass=True)
+    cached = await cache.get_or_compute("key", "gpt-4o", model)
+    return cache, model, bypassed, cached
+
+def test_bypass_calls_the_model_and_refreshes_the_entry():
+    cache, model, bypassed, cached = asyncio.run(bypassed_prompt())
+    assert model.calls == 2 and cache.bypassed == 1
+    assert bypassed == cached == {"ideas": [{"title": "fresh"}]}
+
+def test_memory_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = make_cache()
+
+    async def scenario():
+        model = CountingModel()
+        model.release.set()
+        await cache.get_or_compute("key", "gpt-4o", model)
+        now[0] += cache.ttl.total_seconds() - 1
+        await cache.get_or_compute("key", "gpt-4o", model)
+        now[0] += 2
+        await cache.get_or_compute("key", "gpt-4o", model)
+        return model
+
+    assert asyncio.run(scenario()).calls == 2
+
+@pytest.fixture
+def expired_row():
+    key = uuid.uuid4().hex
+    db = SessionLocal()
+    db.add(LLMResponseCacheEntry(
+        cache_key=key, model="gpt-4o", response={"ideas": []},
+        created_at=datetime.utcnow() - timedelta(hours=2)
+    ))
+    db.commit()
+    db.close()
+    return key
+
+def test_persisted_entries_expire_and_are_purged(expired_row):
+    cache = make_cache(persist=True)
+    cache.ttl = timedelta(hours=1)
+    assert asyncio.run(cache.get(expired_row)) is None
+    assert cache.purge_expired() >= 1
+    db = SessionLocal()
+    try:
+        assert db.get(LLMResponseCacheEntry, expired_row) is None
+    finally:
+        db.close()
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from pagination import decode_cursor, encode_cursor, to_naive_utc
+
+def test_to_naive_utc_converts_offsets():
+    aware = datetime(2026, 10, 16, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert to_naive_utc(aware) == datetime(2026, 10, 16, 10, 0)
+    assert to_naive_utc(datetime.fromisoformat("2026-10-16T10:00:00+00:00")).tzinfo is None
+
+def test_to_naive_utc_keeps_naive_values():
+    naive = datetime(2026, 10, 16, 10, 0)
+    assert to_naive_utc(naive) is naive
+    assert to_naive_utc(None) is None
+
+def test_cursor_round_trip():
+    generated_at = datetime(2026, 10, 16, 10, 0, 0, 123456)
+    assert decode_cursor(encode_cursor(generated_at, 42)) == (generated_at, 42)
+
+def test_bad_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
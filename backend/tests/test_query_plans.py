@@ -0,0 +1,24 @@
+import pytest
+from check_query_plans import CHECKS, check_plan, connect, plan_problem
+
+@pytest.fixture(scope="module")
+def connection():
+    with connect() as connection:
+        yield connection
+
+@pytest.mark.parametrize("check", CHECKS, ids=[check[0] for check in CHECKS])
+def test_query_uses_index(connection, check):
+    name, statement, expected_indexes, *ordered = check
+    problem, plan = check_plan(connection, statement, expected_indexes, *ordered)
+    assert not problem, f"{name}: {problem}\n{plan}"
+
+POSTGRES_SORTED_PLAN = """Limit  (cost=8.17..8.18 rows=1 width=64)
+  ->  Sort  (cost=8.17..8.18 rows=1 width=64)
+        Sort Key: generated_at DESC, id DESC
+        ->  Index Scan using ix_content_ideas_user_id_generated_at on content_ideas"""
+
+def test_nested_postgres_sort_is_reported():
+    assert plan_problem(POSTGRES_SORTED_PLAN, ["ix_content_ideas_user_id_generated_at"])
+
+def test_unordered_checks_ignore_sorts():
+    assert not plan_problem(POSTGRES_SORTED_PLAN, ["ix_content_ideas_user_id_generated_at"], False)
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+from services import rate_limiter
+from services.qloo_service import QlooService
+from services.rate_limiter import TokenBucket
+
+class FakeClock:
+    """monotonic() and sleep() for the rate limiter, with time only moving when it sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        await asyncio.sleep(0)
+
+def install_fake_clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+def test_acquire_spaces_calls_at_the_configured_rate(monkeypatch):
+    clock = install_fake_clock(monkeypatch)
+
+    async def scenario():
+        bucket = TokenBucket(rate=4, capacity=2)
+        times = []
+
+        async def caller():
+            await bucket.acquire()
+            times.append(clock.now)
+
+        await asyncio.gather(*(caller() for _ in range(6)))
+        return bucket, times
+
+    bucket, times = asyncio.run(scenario())
+    # The burst is served at once, then one token every 1/rate seconds
+    assert times == [0.0, 0.0, 0.25, 0.5, 0.75, 1.0]
+    assert bucket.acquired == 6 and bucket.waits == 4
+
+def test_disabled_bucket_never_waits(monkeypatch):
+    clock = install_fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=0, capacity=1)
+
+    async def scenario():
+        await asyncio.gather(*(bucket.acquire() for _ in range(100)))
+
+    asyncio.run(scenario())
+    assert clock.now == 0.0 and bucket.acquired == 0
+
+def qloo_with_responses(*statuses: int) -> QlooService:
+    service = QlooService()
+    service.domain_timeout = 0.05
+    remaining = list(statuses)
+
+    async def get(url, params=None, timeout=None):
+        status = remaining.pop(0)
+        return httpx.Response(status, json={"results": {"entities": []}}, headers={"Retry-After": "0"}, request=httpx.Request("GET", url))
+
+    service.client.get = get
+    return service
+
+def test_waiting_for_a_token_does_not_count_toward_the_domain_timeout():
+    async def scenario():
+        service = qloo_with_responses(200)
+        # One token per 0.1s, already spent: the next request queues for longer than the domain timeout
+        service.rate_limiter = TokenBucket(rate=10, capacity=1)
+        await service.rate_limiter.acquire()
+        return await service._request_domain_insights("music", "urn:entity:artist", ["e1"]), service
+
+    (result, ok), service = asyncio.run(scenario())
+    assert ok and result == {"entities": []}
+    assert service.rate_limiter.waits == 1
+
+def test_retries_take_their_own_tokens():
+    async def scenario():
+        service = qloo_with_responses(503, 200)
+        service.rate_limiter = TokenBucket(rate=1000, capacity=10)
+        return await service._request_domain_insights("music", "urn:entity:artist", ["e1"]), service
+
+    (result, ok), service = asyncio.run(scenario())
+    # One token before the timeout starts, one for the retry; the first attempt doesn't take a second
+    assert ok and service.rate_limiter.acquired == 2
@@ -4,11 +4,7 @@ import { Card } from '../components/ui/card';
 import { Link } from 'react-router-dom';
 import { useQuery } from '@tanstack/react-query';
 import { useAuth } from '../contexts/AuthContext';
-import {
-  creatorProfileAPI,
-  contentAPI,
-  monetizationAPI,
-} from '../services/api';
+import { dashboardAPI } from '../services/api';
 import {
   Lightbulb,
   DollarSign,
@@ -23,50 +19,40 @@ import {
 const Dashboard: React.FC = () => {
   const { user } = useAuth();
 
-  const { data: profiles = [] } = useQuery({
-    queryKey: ['creator-profiles'],
-    queryFn: creatorProfileAPI.getAll,
-  });
-
-  const { data: contentIdeas = [] } = useQuery({
-    queryKey: ['content-ideas'],
-    queryFn: contentAPI.getAll,
-  });
-
-  const { data: monetizationIdeas = [] } = useQuery({
-    queryKey: ['monetization-ideas'],
-    queryFn: monetizationAPI.getAll,
+  const { data: summary } = useQuery({
+    queryKey: ['dashboard-summary'],
+    queryFn: () => dashboardAPI.getSummary(3),
   });
 
-  const savedIdeas = contentIdeas.filter((idea: any) => idea.is_saved);
-  const recentIdeas = contentIdeas.slice(0, 3);
-  const recentMonetizationIdeas = monetizationIdeas.slice(0, 3);
+  const profiles = summary?.profiles ?? [];
+  const recentIdeas = summary?.recent_content_ideas ?? [];
+  const recentMonetizationIdeas = summary?.recent_monetization_ideas ?? [];
 
   const stats = [
     {
       name: 'Creator Profiles',
-      value: profiles.length,
+      value: summary?.profile_count ?? 0,
       icon: Users,
       color: 'text-blue-600',
       bgColor: 'bg-blue-100',
     },
     {
       name: 'Content Ideas',
-      value: contentIdeas.length,
+      value: summary?.content_ideas.total ?? 0,
       icon: Lightbulb,
       color: 'text-yellow-600',
       bgColor: 'bg-yellow-100',
     },
     {
       name: 'Saved Ideas',
-      value: savedIdeas.length,
+      value: summary?.content_ideas.saved ?? 0,
       icon: TrendingUp,
       color: 'text-green-600',
       bgColor: 'bg-green-100',
     },
     {
       name: 'Monetization Ideas',
-      value: monetizationIdeas.length,
+      value: summary?.monetization_ideas.total ?? 0,
       icon: DollarSign,
       color: 'text-purple-600',
       bgColor: 'bg-purple-100',
@@ -6,7 +6,8 @@ import {
   MonetizationIdea,
   AnalysisResponse,
   ContentGenerationResponse,
-  MonetizationGenerationResponse
+  MonetizationGenerationResponse,
+  DashboardSummary
 } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
@@ -103,6 +104,41 @@ export const analysisAPI = {
   },
 };
 
+// List endpoints return one page at a time; follow X-Next-Cursor until the last page
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+
+async function fetchAllPages<T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+    items.push(...response.data);
+    cursor = response.headers[NEXT_CURSOR_HEADER];
+  } while (cursor);
+  return items;
+}
+
+// Dashboard endpoint: counts and the newest ideas in one request
+export const dashboardAPI = {
+  getSummary: async (recent: number = 3): Promise<DashboardSummary> => {
+    const response = await api.get('/dashboard/summary', { params: { recent } });
+    return response.data;
+  },
+};
+
+// Selects ideas for a bulk action by id and/or by the same filters the lists use
+export interface BulkIdeaSelection {
+  ids?: number[];
+  filter?: {
+    saved?: boolean;
+    creator_profile_id?: number;
+    content_type?: string;
+    collaboration_type?: string;
+    generated_after?: string;
+    generated_before?: string;
+  };
+}
+
 // Content generation endpoints
 export const contentAPI = {
   deleteIdea: async (ideaId: number): Promise<{ message: string }> => {
@@ -123,19 +159,27 @@ export const contentAPI = {
   },
 
   getAll: async (): Promise<ContentIdea[]> => {
-    const response = await api.get('/content-ideas');
-    return response.data;
+    return fetchAllPages<ContentIdea>('/content-ideas');
   },
 
   getSaved: async (): Promise<ContentIdea[]> => {
-    const response = await api.get('/content-ideas?saved=true');
-    return response.data;
+    return fetchAllPages<ContentIdea>('/content-ideas', { saved: true });
   },
 
   saveIdea: async (ideaId: number): Promise<{ message: string }> => {
     const response = await api.put(`/content-ideas/${ideaId}/save`);
     return response.data;
   },
+
+  bulkSave: async (selection: BulkIdeaSelection, isSaved: boolean = true): Promise<{ updated: number }> => {
+    const response = await api.post('/content-ideas/bulk-save', { ...selection, is_saved: isSaved });
+    return response.data;
+  },
+
+  bulkDelete: async (selection: BulkIdeaSelection): Promise<{ deleted: number }> => {
+    const response = await api.post('/content-ideas/bulk-delete', selection);
+    return response.data;
+  },
 };
 
 // Monetization endpoints
@@ -152,13 +196,11 @@ export const monetizationAPI = {
   },
 
   getAll: async (): Promise<MonetizationIdea[]> => {
-    const response = await api.get('/monetization-ideas');
-    return response.data;
+    return fetchAllPages<MonetizationIdea>('/monetization-ideas');
   },
 
   getSaved: async (): Promise<MonetizationIdea[]> => {
-    const response = await api.get('/monetization-ideas?saved=true');
-    return response.data;
+    return fetchAllPages<MonetizationIdea>('/monetization-ideas', { saved: true });
   },
 
   saveIdea: async (ideaId: number): Promise<MonetizationIdea> => {
@@ -169,6 +211,14 @@ export const monetizationAPI = {
     const response = await api.delete(`/monetization-ideas/${ideaId}`);
     return response.data;
   },
+  bulkSave: async (selection: BulkIdeaSelection, isSaved: boolean = true): Promise<{ updated: number }> => {
+    const response = await api.post('/monetization-ideas/bulk-save', { ...selection, is_saved: isSaved });
+    return response.data;
+  },
+  bulkDelete: async (selection: BulkIdeaSelection): Promise<{ deleted: number }> => {
+    const response = await api.post('/monetization-ideas/bulk-delete', selection);
+    return response.data;
+  },
 };
 
 export default api; 
\ No newline at end of file
@@ -64,6 +64,26 @@ export interface MonetizationIdea {
     generated_at: string;
 }
 
+export interface IdeaCounts {
+    total: number;
+    saved: number;
+    by_type: Record<string, number>;
+}
+
+export interface DashboardSummary {
+    profile_count: number;
+    profiles: {
+        id: number;
+        profile_name: string;
+        content_ideas: number;
+        monetization_ideas: number;
+    }[];
+    content_ideas: IdeaCounts;
+    monetization_ideas: IdeaCounts;
+    recent_content_ideas: ContentIdea[];
+    recent_monetization_ideas: MonetizationIdea[];
+}
+
 export interface AnalysisResponse {
     taste_profile: {
         taste_profile: any;